@@ -0,0 +1,45 @@
+"""enable_pg_stat_statements
+
+Revision ID: 2c4efb7c8e5d
+Revises: 94fd090bb006
+Create Date: 2026-10-15 10:52:41.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c4efb7c8e5d'
+down_revision: Union[str, None] = '94fd090bb006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # Extensions are Postgres-only
+        return
+    # Statistics are only collected when pg_stat_statements is also listed
+    # in shared_preload_libraries on the server. Servers that don't ship the
+    # extension are left without it rather than failing the upgrade.
+    op.execute("""
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_stat_statements') THEN
+            CREATE EXTENSION IF NOT EXISTS pg_stat_statements;
+        END IF;
+    END
+    $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # Extensions are Postgres-only
+        return
+    op.execute("DROP EXTENSION IF EXISTS pg_stat_statements")
@@ -0,0 +1,115 @@
+"""partition_memory_access_logs
+
+Revision ID: 3aa5d0fcea2a
+Revises: e8b41184b672
+Create Date: 2026-10-15 14:31:58.209634
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3aa5d0fcea2a'
+down_revision: Union[str, None] = 'e8b41184b672'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('idx_access_memory_time', ['memory_id', 'accessed_at']),
+    ('idx_access_app_time', ['app_id', 'accessed_at']),
+    ('idx_access_user_time', ['user_id', 'accessed_at']),
+    ('idx_access_type_time', ['access_type', 'accessed_at']),
+    ('ix_memory_access_logs_accessed_at', ['accessed_at']),
+]
+
+# Monthly partitions created up front; the app adds later months at startup
+MONTHS_AHEAD = 2
+
+
+def _month_ranges(count):
+    today = datetime.date.today()
+    year, month = today.year, today.month
+    for _ in range(count):
+        start = datetime.date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        yield start, datetime.date(year, month, 1)
+
+
+def _create_table(name, *constraints, **kw):
+    op.create_table(name,
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('memory_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('app_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('accessed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('access_type', sa.String(50), nullable=False),
+        sa.Column('ip_address', sa.String(45), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('metadata', sa.JSON(), server_default='{}', nullable=False),
+        sa.ForeignKeyConstraint(['app_id'], ['apps.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['memory_id'], ['memories.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        # Widened from the initial schema to the types the MCP server writes
+        sa.CheckConstraint(
+            "access_type IN ('read', 'write', 'update', 'delete', 'search', 'list', 'delete_all')",
+            name='check_access_type'
+        ),
+        *constraints,
+        **kw
+    )
+
+
+def _move_aside():
+    """Rename the current table (and its index names) out of the way."""
+    for index, _ in INDEXES:
+        op.drop_index(index, table_name='memory_access_logs', if_exists=True)
+    op.rename_table('memory_access_logs', 'memory_access_logs_old')
+    op.execute('ALTER TABLE memory_access_logs_old RENAME CONSTRAINT memory_access_logs_pkey TO memory_access_logs_old_pkey')
+
+
+def _copy_rows_and_index():
+    # Explicit columns: tables built by create_all may order them differently
+    # and allowed NULL accessed_at (now the partition key) and metadata
+    op.execute(
+        'INSERT INTO memory_access_logs '
+        '(id, memory_id, app_id, user_id, accessed_at, access_type, ip_address, user_agent, metadata) '
+        "SELECT id, memory_id, app_id, user_id, COALESCE(accessed_at, now()), access_type, "
+        "ip_address, user_agent, COALESCE(metadata, '{}') "
+        'FROM memory_access_logs_old'
+    )
+    op.drop_table('memory_access_logs_old')
+    for index, columns in INDEXES:
+        op.create_index(index, 'memory_access_logs', columns, unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # Table partitioning is Postgres-only
+        return
+    _move_aside()
+    _create_table('memory_access_logs',
+                  sa.PrimaryKeyConstraint('id', 'accessed_at', name='memory_access_logs_pkey'),
+                  postgresql_partition_by='RANGE (accessed_at)')
+    op.execute('CREATE TABLE memory_access_logs_default PARTITION OF memory_access_logs DEFAULT')
+    for start, end in _month_ranges(MONTHS_AHEAD + 1):
+        op.execute(
+            f"CREATE TABLE memory_access_logs_y{start:%Y}m{start:%m} PARTITION OF memory_access_logs "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    _copy_rows_and_index()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # Table partitioning is Postgres-only
+        return
+    _move_aside()
+    _create_table('memory_access_logs', sa.PrimaryKeyConstraint('id', name='memory_access_logs_pkey'))
+    _copy_rows_and_index()
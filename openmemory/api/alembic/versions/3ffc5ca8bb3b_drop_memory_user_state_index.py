@@ -0,0 +1,32 @@
+"""drop_memory_user_state_index
+
+Revision ID: 3ffc5ca8bb3b
+Revises: e1614479b96b
+Create Date: 2026-10-15 13:41:52.270931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3ffc5ca8bb3b'
+down_revision: Union[str, None] = 'e1614479b96b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Active-memory lookups by user go through the partial
+    # idx_memory_user_app_active (user_id leading, state = 'active'); any
+    # other user_id lookup, including the users FK cascade, uses
+    # idx_memory_user_app. The full (user_id, state) index only added
+    # write cost, mostly for deleted/archived rows.
+    op.drop_index('idx_memory_user_state', table_name='memories')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_memory_user_state', 'memories', ['user_id', 'state'], unique=False)
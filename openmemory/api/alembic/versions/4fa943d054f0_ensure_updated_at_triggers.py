@@ -0,0 +1,57 @@
+"""ensure_updated_at_triggers
+
+Revision ID: 4fa943d054f0
+Revises: a3851f4f5537
+Create Date: 2026-10-15 10:05:51.772310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4fa943d054f0'
+down_revision: Union[str, None] = 'a3851f4f5537'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UPDATED_AT_TABLES = ['users', 'apps', 'memories', 'categories', 'configs']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # plpgsql triggers are Postgres-only
+        return
+    # The application no longer sets updated_at on UPDATE; make sure every
+    # table carries the BEFORE UPDATE trigger, including databases that were
+    # bootstrapped with create_all() and stamped without running 0b53c747049a.
+    op.execute("""
+    CREATE OR REPLACE FUNCTION update_updated_at_column()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_at = CURRENT_TIMESTAMP;
+        RETURN NEW;
+    END;
+    $$ language 'plpgsql';
+    """)
+
+    for table in UPDATED_AT_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS update_{table}_updated_at ON {table}")
+        op.execute(f"""
+        CREATE TRIGGER update_{table}_updated_at
+        BEFORE UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # plpgsql triggers are Postgres-only
+        return
+    # The triggers predate this revision (0b53c747049a), so they are left in
+    # place; only databases that lacked them end up with extra triggers.
+    pass
@@ -0,0 +1,34 @@
+"""add_active_user_app_memory_index
+
+Revision ID: 672256b4c96e
+Revises: afd00efbd06b
+Create Date: 2026-10-15 09:12:03.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '672256b4c96e'
+down_revision: Union[str, None] = 'afd00efbd06b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-user/per-app listings only ever look at active memories; a partial
+    # composite index answers them with a single index scan instead of
+    # bitmap-ANDing the single-column indexes.
+    op.create_index(
+        'idx_memory_user_app_active', 'memories', ['user_id', 'app_id'],
+        unique=False, postgresql_where=sa.text("state = 'active'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_memory_user_app_active', table_name='memories')
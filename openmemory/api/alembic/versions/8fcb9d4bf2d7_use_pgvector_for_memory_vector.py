@@ -0,0 +1,53 @@
+"""use_pgvector_for_memory_vector
+
+Revision ID: 8fcb9d4bf2d7
+Revises: caa1f2ec6f03
+Create Date: 2026-10-15 13:02:41.118305
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8fcb9d4bf2d7'
+down_revision: Union[str, None] = 'caa1f2ec6f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same setting as app.models.EMBEDDING_DIMS (the embedder's output size)
+EMBEDDING_DIMS = int(os.getenv("EMBEDDING_DIMS", "1536"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # pgvector is Postgres-only
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    # Embeddings were stored as JSON arrays, which is also pgvector's text format
+    op.alter_column('memories', 'vector',
+                    existing_type=sa.Text(),
+                    type_=Vector(EMBEDDING_DIMS),
+                    existing_nullable=True,
+                    postgresql_using=f'vector::vector({EMBEDDING_DIMS})')
+    op.create_index('idx_memory_vector_hnsw', 'memories', ['vector'],
+                    postgresql_using='hnsw',
+                    postgresql_ops={'vector': 'vector_cosine_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # pgvector is Postgres-only
+        return
+    op.drop_index('idx_memory_vector_hnsw', table_name='memories')
+    op.alter_column('memories', 'vector',
+                    existing_type=Vector(EMBEDDING_DIMS),
+                    type_=sa.Text(),
+                    existing_nullable=True,
+                    postgresql_using='vector::text')
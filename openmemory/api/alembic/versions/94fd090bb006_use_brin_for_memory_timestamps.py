@@ -0,0 +1,37 @@
+"""use_brin_for_memory_timestamps
+
+Revision ID: 94fd090bb006
+Revises: 4fa943d054f0
+Create Date: 2026-10-15 10:31:08.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '94fd090bb006'
+down_revision: Union[str, None] = '4fa943d054f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # idx_memory_created_at duplicated ix_memories_created_at. Keep one btree
+    # for ORDER BY created_at pagination and use BRIN (min/max per block
+    # range, a few KB) for time-range scans on the append-mostly timestamps.
+    op.drop_index('idx_memory_created_at', table_name='memories')
+    op.create_index('idx_memory_created_brin', 'memories', ['created_at'], unique=False,
+                    postgresql_using='brin', postgresql_with={'pages_per_range': 32})
+    op.create_index('idx_memory_updated_brin', 'memories', ['updated_at'], unique=False,
+                    postgresql_using='brin', postgresql_with={'pages_per_range': 32})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_memory_updated_brin', table_name='memories')
+    op.drop_index('idx_memory_created_brin', table_name='memories')
+    op.create_index('idx_memory_created_at', 'memories', ['created_at'], unique=False)
@@ -0,0 +1,42 @@
+"""convert_memory_metadata_to_jsonb
+
+Revision ID: a3851f4f5537
+Revises: 672256b4c96e
+Create Date: 2026-10-15 09:40:27.120934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3851f4f5537'
+down_revision: Union[str, None] = '672256b4c96e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # jsonb is Postgres-only
+        return
+    # jsonb is stored pre-parsed, so containment (@>) and key-exists (?)
+    # filters run server-side and can use a GIN index.
+    op.execute("ALTER TABLE memories ALTER COLUMN metadata DROP DEFAULT")
+    op.execute("ALTER TABLE memories ALTER COLUMN metadata TYPE jsonb USING metadata::jsonb")
+    op.execute("ALTER TABLE memories ALTER COLUMN metadata SET DEFAULT '{}'::jsonb")
+    op.create_index('idx_memory_metadata_gin', 'memories', ['metadata'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # jsonb is Postgres-only
+        return
+    op.drop_index('idx_memory_metadata_gin', table_name='memories')
+    op.execute("ALTER TABLE memories ALTER COLUMN metadata DROP DEFAULT")
+    op.execute("ALTER TABLE memories ALTER COLUMN metadata TYPE json USING metadata::json")
+    op.execute("ALTER TABLE memories ALTER COLUMN metadata SET DEFAULT '{}'::json")
@@ -0,0 +1,50 @@
+"""use_enum_for_access_control_effect
+
+Revision ID: caa1f2ec6f03
+Revises: 2c4efb7c8e5d
+Create Date: 2026-10-15 11:20:17.532904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'caa1f2ec6f03'
+down_revision: Union[str, None] = '2c4efb7c8e5d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ac_effect = postgresql.ENUM('allow', 'deny', name='ac_effect')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # Named enum types are Postgres-only; SQLite stores the effect as text
+        return
+    ac_effect.create(op.get_bind(), checkfirst=True)
+    # The enum type validates values itself, so the CHECK is redundant
+    op.execute("ALTER TABLE access_controls DROP CONSTRAINT IF EXISTS check_effect")
+    op.alter_column('access_controls', 'effect',
+                    existing_type=sa.String(),
+                    type_=ac_effect,
+                    existing_nullable=False,
+                    postgresql_using='effect::ac_effect')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # Named enum types are Postgres-only; SQLite stores the effect as text
+        return
+    op.alter_column('access_controls', 'effect',
+                    existing_type=ac_effect,
+                    type_=sa.String(),
+                    existing_nullable=False,
+                    postgresql_using='effect::text')
+    op.create_check_constraint('check_effect', 'access_controls', "effect IN ('allow', 'deny')")
+    ac_effect.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,39 @@
+"""add_categorization_failures
+
+Revision ID: cbab898774f6
+Revises: 3aa5d0fcea2a
+Create Date: 2026-10-15 14:52:36.917054
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cbab898774f6'
+down_revision: Union[str, None] = '3aa5d0fcea2a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('categorization_failures',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('memory_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('failed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['memory_id'], ['memories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_categorization_failures_memory_id'), 'categorization_failures', ['memory_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_categorization_failures_memory_id'), table_name='categorization_failures')
+    op.drop_table('categorization_failures')
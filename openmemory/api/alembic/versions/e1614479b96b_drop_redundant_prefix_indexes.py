@@ -0,0 +1,47 @@
+"""drop_redundant_prefix_indexes
+
+Revision ID: e1614479b96b
+Revises: 8fcb9d4bf2d7
+Create Date: 2026-10-15 13:24:09.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1614479b96b'
+down_revision: Union[str, None] = '8fcb9d4bf2d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, index, columns) for single-column indexes that are the leading
+# column of a composite index / primary key on the same table, or exact
+# duplicates of another index.
+REDUNDANT_INDEXES = [
+    ('apps', 'ix_apps_owner_id', ['owner_id']),                                  # idx_app_owner_name
+    ('memories', 'ix_memories_user_id', ['user_id']),                            # idx_memory_user_state
+    ('memories', 'ix_memories_app_id', ['app_id']),                              # idx_memory_app_state
+    ('memory_categories', 'ix_memory_categories_memory_id', ['memory_id']),      # primary key
+    ('memory_categories', 'idx_memory_category', ['memory_id', 'category_id']),  # primary key
+    ('memory_status_history', 'ix_memory_status_history_memory_id', ['memory_id']),    # idx_history_memory_state
+    ('memory_status_history', 'ix_memory_status_history_changed_by', ['changed_by']),  # idx_history_user_time
+    ('memory_status_history', 'ix_memory_status_history_changed_at', ['changed_at']),  # idx_history_changed_at
+    ('memory_access_logs', 'ix_memory_access_logs_memory_id', ['memory_id']),      # idx_access_memory_time
+    ('memory_access_logs', 'ix_memory_access_logs_app_id', ['app_id']),            # idx_access_app_time
+    ('memory_access_logs', 'ix_memory_access_logs_user_id', ['user_id']),          # idx_access_user_time
+    ('memory_access_logs', 'ix_memory_access_logs_access_type', ['access_type']),  # idx_access_type_time
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, index, _ in REDUNDANT_INDEXES:
+        op.drop_index(index, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, index, columns in REDUNDANT_INDEXES:
+        op.create_index(index, table, columns, unique=False, if_not_exists=True)
@@ -0,0 +1,52 @@
+"""default_timestamps_to_now
+
+Revision ID: e8b41184b672
+Revises: 3ffc5ca8bb3b
+Create Date: 2026-10-15 14:03:27.845512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b41184b672'
+down_revision: Union[str, None] = '3ffc5ca8bb3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = [
+    ('users', 'created_at'), ('users', 'updated_at'),
+    ('apps', 'created_at'), ('apps', 'updated_at'),
+    ('configs', 'created_at'), ('configs', 'updated_at'),
+    ('memories', 'created_at'), ('memories', 'updated_at'),
+    ('categories', 'created_at'), ('categories', 'updated_at'),
+    ('access_controls', 'created_at'),
+    ('archive_policies', 'created_at'),
+    ('memory_status_history', 'changed_at'),
+    ('memory_access_logs', 'accessed_at'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # SQLite cannot alter column defaults in place
+        return
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=sa.DateTime(timezone=True),
+                        server_default=sa.text('now()'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # SQLite cannot alter column defaults in place
+        return
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=sa.DateTime(timezone=True),
+                        server_default=None)
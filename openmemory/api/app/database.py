@@ -1,9 +1,18 @@
+import logging
 import os
-from sqlalchemy import create_engine
+import time
+import uuid
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import List, Optional
+
+import orjson
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
-from sqlalchemy.orm import sessionmaker
 
 # load .env file (make sure you have DATABASE_URL set)
 load_dotenv()
@@ -11,30 +20,203 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./openmemory.db")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set in environment")
-if "postgresql" in DATABASE_URL:
-    # PostgreSQL configuration
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
-        pool_recycle=3600,
-        echo=False  # Set to True for debugging
-    )
-elif "sqlite" in DATABASE_URL:
-    # SQLite fallback for local development
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        pool_pre_ping=True
-    )
-else:
-    # Default engine for other databases
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Set PGBOUNCER=1 when DATABASE_URL points at PgBouncer in transaction
+# pooling mode. Named prepared statements don't survive a switch of server
+# connection there ("prepared statement already exists"), so server-side
+# statement caching is turned off and pooling is left to PgBouncer.
+USE_PGBOUNCER = os.getenv("PGBOUNCER", "").lower() in ("1", "true", "yes")
+
+
+def _json_dumps(value) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# JSON/JSONB columns (configs.value, metadata) are (de)serialized with orjson
+# instead of the stdlib json module
+_JSON_KWARGS = {"json_serializer": _json_dumps, "json_deserializer": orjson.loads}
+
+
+def _pool_kwargs():
+    """Connection pool settings shared by the sync and async Postgres engines."""
+    if USE_PGBOUNCER:
+        return {"poolclass": NullPool}
+    return {
+        # Sized to the expected request concurrency; max_overflow=0 with a
+        # short pool_timeout fails fast instead of queueing unbounded.
+        "pool_size": int(os.getenv("DB_POOL_SIZE", max(20, (os.cpu_count() or 1) * 4))),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 0)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 2)),
+        "pool_recycle": 3600,
+    }
+
+
+# Prepared statements switch to a cached generic plan after five
+# executions. memories is heavily skewed by user/app, so a plan that suits
+# a small user can be badly wrong for a large one. force_custom_plan makes
+# the planner use the actual parameter values on every execution; that
+# costs some planning time, but avoids the generic-plan cliff. It is not
+# set under PgBouncer: statements are not prepared there, and PgBouncer
+# rejects unknown startup parameters.
+PLAN_CACHE_MODE = "force_custom_plan"
+
+
+# Slow-query logging and per-request query counting. Statements slower
+# than SLOW_QUERY_MS are logged with their elapsed time; the count of
+# statements issued while handling a request is collected in a contextvar
+# (a shared mutable cell, so sync handlers in the threadpool report too).
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 50))
+_query_count: ContextVar[Optional[List[int]]] = ContextVar("query_count", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # One statement runs at a time per connection, so a single slot is
+    # enough; a statement that fails just has its start overwritten by the
+    # next one
+    conn.info["query_start_time"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info.pop("query_start_time")) * 1000
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    if elapsed_ms > SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+
+
+def _install_query_hooks(sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@lru_cache(maxsize=1)
+def get_engine():
+    """Build the sync engine once per process (re-imports reuse the same pool)."""
+    if "postgresql" in DATABASE_URL:
+        # PostgreSQL configuration. A bare postgresql:// URL uses the psycopg
+        # (v3) driver so repeated parameterized queries are prepared
+        # server-side on first execution (prepare_threshold=0) and skip the
+        # Parse/plan round-trip afterwards. An explicitly named driver (e.g.
+        # postgresql+psycopg2://) is kept, without the psycopg-only settings.
+        url = make_url(DATABASE_URL)
+        if url.drivername == "postgresql":
+            url = url.set(drivername="postgresql+psycopg")
+        connect_args = {} if USE_PGBOUNCER else {"options": f"-c plan_cache_mode={PLAN_CACHE_MODE}"}
+        if url.get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = None if USE_PGBOUNCER else 0
+        sync_engine = create_engine(
+            url,
+            connect_args=connect_args,
+            query_cache_size=1200,  # SQLAlchemy compiled-statement cache
+            # executemany() of INSERTs is rewritten into multi-row
+            # INSERT ... VALUES (...), (...) batches of this size.
+            insertmanyvalues_page_size=1000,
+            pool_pre_ping=True,
+            echo=False,  # Set to True for debugging
+            **_JSON_KWARGS,
+            **_pool_kwargs()
+        )
+    elif "sqlite" in DATABASE_URL:
+        # SQLite fallback for local development
+        sync_engine = create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            pool_pre_ping=True,
+            **_JSON_KWARGS
+        )
+    else:
+        # Default engine for other databases
+        sync_engine = create_engine(DATABASE_URL, pool_pre_ping=True, **_JSON_KWARGS)
+    _install_query_hooks(sync_engine)
+    return sync_engine
+
+
+@lru_cache(maxsize=1)
+def get_sessionmaker():
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
 Base = declarative_base()
 
+
+def _async_database_url(url: str) -> URL:
+    """Map a DATABASE_URL onto its asyncio driver (asyncpg / aiosqlite),
+    whichever sync driver it names.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg")
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite")
+    raise RuntimeError(
+        f"DATABASE_URL uses {parsed.drivername!r}, which has no supported asyncio "
+        "driver; use a postgresql:// or sqlite:// URL"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_async_engine():
+    """Async engine for request handlers that run on the event loop, so DB
+    round-trips don't block other requests. asyncpg caches prepared
+    statements per connection on its own.
+    """
+    if "postgresql" in DATABASE_URL:
+        if USE_PGBOUNCER:
+            # asyncpg's statement_cache_size (default 100 per connection) and
+            # SQLAlchemy's prepared_statement_cache_size both have to be zero
+            # behind PgBouncer; unique names avoid collisions on reused backends.
+            async_connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        else:
+            async_connect_args = {"server_settings": {"plan_cache_mode": PLAN_CACHE_MODE}}
+        aengine = create_async_engine(
+            _async_database_url(DATABASE_URL),
+            connect_args=async_connect_args,
+            pool_pre_ping=True,
+            echo=False,
+            **_JSON_KWARGS,
+            **_pool_kwargs()
+        )
+    else:
+        aengine = create_async_engine(_async_database_url(DATABASE_URL), **_JSON_KWARGS)
+    _install_query_hooks(aengine.sync_engine)
+    return aengine
+
+
+@lru_cache(maxsize=1)
+def get_async_sessionmaker():
+    return async_sessionmaker(get_async_engine(), expire_on_commit=False, class_=AsyncSession)
+
+
+# Module-level handles kept for existing imports
+engine = get_engine()
+SessionLocal = get_sessionmaker()
+
+
+def __getattr__(name):
+    # async_engine / AsyncSessionLocal are built on first access, so sync-only
+    # entry points (startup.py, alembic) never load an asyncio driver
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "AsyncSessionLocal":
+        return get_async_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def start_query_count():
+    """Start counting statements in the current context; returns the counter cell."""
+    counter = [0]
+    _query_count.set(counter)
+    return counter
+
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -15,27 +15,42 @@ Key features:
 - Environment variable parsing for API keys
 """
 
+import asyncio
 import logging
-import json
+import httpx
+import orjson
 from mcp.server.fastmcp import FastMCP
 from mcp.server.sse import SseServerTransport
-from app.utils.memory import get_memory_client
+from app.utils import memory as memory_utils
+from app.utils.memory import get_memory_client, ensure_indexes_after_add
 from fastapi import FastAPI, Request
 from fastapi.routing import APIRouter
 import contextvars
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Union
 import os
 from dotenv import load_dotenv
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal
 from app.models import Memory, MemoryState, MemoryStatusHistory, MemoryAccessLog
-from app.utils.db import get_user_and_app
+from app.utils.db import bulk_insert_memories_async, resolve_user_and_app_async
 import uuid
 import datetime
-from app.utils.permissions import check_memory_access_permissions
-from qdrant_client import models as qdrant_models
+from app.utils.permissions import accessible_memories_query, accessible_memory_ids_query, inaccessible_memory_ids_query
+from sqlalchemy import insert, select
 
 # Load environment variables
 load_dotenv()
 
+# Echo the raw mem0 response in add_memories replies (debugging aid; off by
+# default since it roughly doubles the reply size)
+INCLUDE_RAW_RESPONSE = os.getenv("MCP_INCLUDE_RAW_RESPONSE", "0").lower() in ("1", "true", "yes")
+
+# Direct Qdrant search limits (see _user_search_filter)
+SEARCH_LIMIT = 10
+MAX_EXCLUDED_IDS = int(os.getenv("MCP_MAX_EXCLUDED_IDS", 1000))
+SEARCH_OVERFETCH = 4
+
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,19 +58,203 @@ logger = logging.getLogger(__name__)
 # Initialize MCP
 mcp = FastMCP("mem0-mcp-server")
 
-# Don't initialize memory client at import time - do it lazily when needed
-def get_memory_client_safe():
+@dataclass(slots=True)
+class SearchHit:
+    """One direct-Qdrant search result; orjson serializes it as an object."""
+    id: Union[uuid.UUID, str]
+    memory: str
+    hash: Optional[str]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    score: float
+
+
+def _jdumps(obj) -> str:
+    """Serialize a tool reply with orjson (UUIDs and datetimes are handled natively)."""
+    return orjson.dumps(obj, default=str).decode()
+
+
+# Don't initialize memory client at import time - do it lazily when needed.
+# The first successful client is cached for the process; a config reset in
+# app.utils.memory (which drops its own _memory_client) or a connection
+# error invalidates it.
+_MEMORY_CLIENT = None
+_MEMORY_CLIENT_LOCK = asyncio.Lock()
+
+
+def _init_memory_client():
+    client = get_memory_client()
+    if client:
+        # Ensure indexes exist once, right after the client comes up
+        ensure_indexes_after_add()
+    return client
+
+
+async def get_memory_client_safe():
     """Get memory client with error handling. Returns None if client cannot be initialized."""
-    try:
-        client = get_memory_client()
-        if client:
-            # Ensure indexes exist after getting client
-            from app.utils.memory import ensure_indexes_after_add
-            ensure_indexes_after_add()
+    global _MEMORY_CLIENT
+    client = _MEMORY_CLIENT
+    if client is not None and client is memory_utils._memory_client:
         return client
+    async with _MEMORY_CLIENT_LOCK:
+        if _MEMORY_CLIENT is None or _MEMORY_CLIENT is not memory_utils._memory_client:
+            _embed_cached.cache_clear()
+            try:
+                loop = asyncio.get_running_loop()
+                _MEMORY_CLIENT = await loop.run_in_executor(None, _init_memory_client)
+            except Exception as e:
+                logger.warning("Failed to get memory client: %s", e)
+                _MEMORY_CLIENT = None
+        return _MEMORY_CLIENT
+
+
+def invalidate_memory_client():
+    """Drop the cached client so the next tool call re-initializes it."""
+    global _MEMORY_CLIENT
+    _MEMORY_CLIENT = None
+    _embed_cached.cache_clear()
+    memory_utils.reset_memory_client()
+
+
+@lru_cache(maxsize=4096)
+def _embed_cached(embedding_model, query: str, mode: str):
+    """Memoize query embeddings; repeated searches skip the embedder round-trip.
+
+    The model is part of the key, and the cache is cleared whenever the
+    memory client is rebuilt, so a config change never serves stale vectors.
+    """
+    return embedding_model.embed(query, mode)
+
+
+def _invalidate_on_connection_error(error: Exception):
+    if isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError)):
+        logger.warning("Memory backend connection error, resetting client: %s", error)
+        invalidate_memory_client()
+
+
+@lru_cache(maxsize=1024)
+def _user_condition(uid: str):
+    # qdrant_client is imported on first use (here and below): it is only
+    # needed once a Qdrant-backed search runs, and it is slow to import
+    from qdrant_client import models as qdrant_models
+
+    # Shared across requests and never mutated
+    return qdrant_models.FieldCondition.model_construct(
+        key="user_id", match=qdrant_models.MatchValue.model_construct(value=uid)
+    )
+
+
+def _user_search_filter(uid: str, excluded_memory_ids):
+    """Qdrant filter for a user's memories minus the ids the ACL denies.
+
+    Filters on the indexed user_id payload field and excludes the rejected
+    ids rather than enumerating every accessible id. Memory state is not in
+    the Qdrant payload, so archived or paused memories can only be excluded
+    by id, and that list grows with the user's history. Only the first
+    MAX_EXCLUDED_IDS go into the filter to keep it cheap. The caller
+    over-fetches and drops any other excluded hits, so a search with more
+    exclusions than that may return fewer than SEARCH_LIMIT results.
+    Inputs are trusted, so pydantic validation is skipped.
+    """
+    from qdrant_client import models as qdrant_models
+
+    must_not = None
+    if excluded_memory_ids:
+        must_not = [qdrant_models.HasIdCondition.model_construct(
+            has_id=[str(memory_id) for memory_id in excluded_memory_ids[:MAX_EXCLUDED_IDS]]
+        )]
+    return qdrant_models.Filter.model_construct(must=[_user_condition(uid)], must_not=must_not)
+
+
+class _SearchBatcher:
+    """Coalesce concurrent Qdrant searches into query_batch_points calls.
+
+    When no batch is in flight a search is sent on the next loop iteration,
+    so an idle server adds no latency. Searches arriving while a batch is
+    in flight queue up and go out together when it completes, or after
+    `window` seconds, whichever is first.
+    """
+
+    def __init__(self, window: float = 0.01, max_batch: int = 64):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._in_flight = 0
+        self._timer = None
+        self._tasks = set()
+
+    async def search(self, client, collection_name, query, query_filter, limit):
+        from qdrant_client import models as qdrant_models
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = qdrant_models.QueryRequest(query=query, filter=query_filter, limit=limit, with_payload=True)
+        self._pending.append((client, collection_name, request, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(0 if self._in_flight == 0 else self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        groups = {}
+        for client, collection_name, request, future in pending:
+            groups.setdefault((id(client), collection_name), (client, collection_name, []))[2].append((request, future))
+        for client, collection_name, items in groups.values():
+            for start in range(0, len(items), self.max_batch):
+                task = asyncio.create_task(self._run(client, collection_name, items[start:start + self.max_batch]))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, client, collection_name, items):
+        self._in_flight += 1
+        try:
+            responses = await client.query_batch_points(
+                collection_name=collection_name,
+                requests=[request for request, _ in items],
+            )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), response in zip(items, responses):
+                if not future.done():
+                    future.set_result(response)
+        finally:
+            self._in_flight -= 1
+            if self._pending and self._timer is None:
+                self._flush()
+
+
+_search_batcher = _SearchBatcher()
+
+
+_background_tasks = set()
+
+
+async def _flush_access_logs(access_rows):
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(MemoryAccessLog), access_rows)
+            await db.commit()
     except Exception as e:
-        logger.warning(f"Failed to get memory client: {e}")
-        return None
+        logger.warning("Failed to write %d access log rows: %s", len(access_rows), e)
+
+
+def _log_access_in_background(access_rows):
+    """Write access-log rows from a separate task so the reply doesn't wait on the commit."""
+    if not access_rows:
+        return
+    task = asyncio.create_task(_flush_access_logs(access_rows))
+    # Keep a reference until done; the loop only holds weak references
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
 
 # Context variables for user_id and client_name
 user_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("user_id")
@@ -73,28 +272,29 @@ async def add_memories(text: str) -> str:
     client_name = client_name_var.get(None)
 
     if not uid:
-        return json.dumps({"error": "user_id not provided", "success": False})
+        return _jdumps({"error": "user_id not provided", "success": False})
     if not client_name:
-        return json.dumps({"error": "client_name not provided", "success": False})
+        return _jdumps({"error": "client_name not provided", "success": False})
     if not text or not text.strip():
-        return json.dumps({"error": "text is required and cannot be empty", "success": False})
+        return _jdumps({"error": "text is required and cannot be empty", "success": False})
 
-    logger.info(f"🔍 Adding memory for user {uid}: '{text[:50]}...'")
+    logger.info("🔍 Adding memory for user %s: '%.50s...'", uid, text)
 
     # Get memory client safely
-    memory_client = get_memory_client_safe()
+    memory_client = await get_memory_client_safe()
     if not memory_client:
-        return json.dumps({"error": "Memory system is currently unavailable. Please try again later.", "success": False})
+        return _jdumps({"error": "Memory system is currently unavailable. Please try again later.", "success": False})
+
+    now = datetime.datetime.now(datetime.UTC)
 
     try:
-        db = SessionLocal()
-        try:
+        async with AsyncSessionLocal() as db:
             # Get or create user and app
-            user, app = get_user_and_app(db, user_id=uid, app_id=client_name)
+            user, app = await resolve_user_and_app_async(db, user_id=uid, app_id=client_name)
 
             # Check if app is active
             if not app.is_active:
-                return json.dumps({
+                return _jdumps({
                     "error": f"App {app.name} is currently paused on OpenMemory. Cannot create new memories.", 
                     "success": False
                 })
@@ -104,56 +304,61 @@ async def add_memories(text: str) -> str:
                 "user_id": uid,  # Ensure user_id is in metadata for filtering
                 "source_app": "openmemory",
                 "mcp_client": client_name,
-                "timestamp": datetime.datetime.now(datetime.UTC).isoformat()
+                "app_id": str(app.id),  # Keyword-indexed in Qdrant for payload filtering
+                "timestamp": now.isoformat()
             }
 
             # Add memory
-            response = memory_client.add(
+            response = await asyncio.to_thread(
+                memory_client.add,
                 messages=[{"role": "user", "content": text}],
                 user_id=uid,
                 metadata=enhanced_metadata
             )
 
-            logger.info(f"✅ Memory client response: {response}")
-            logger.info(f"✅ Response type: {type(response)}")
+            logger.debug("Memory client response: %r", response)
 
             # Process the response and update database
             memories_added = []
+            history_rows = []
+            new_rows = []
             
             if isinstance(response, dict) and 'results' in response:
-                # Handle Mem0 response format with results array
-                for result in response['results']:
-                    memory_id = uuid.UUID(result['id']) if 'id' in result else uuid.uuid4()
-                    memory = db.query(Memory).filter(Memory.id == memory_id).first()
+                # Handle Mem0 response format with results array. Load every
+                # referenced memory in one IN query up front.
+                result_ids = [uuid.UUID(result['id']) if 'id' in result else uuid.uuid4() for result in response['results']]
+                existing = (await db.execute(select(Memory).where(Memory.id.in_(result_ids)))).scalars().all()
+                existing_by_id = {memory.id: memory for memory in existing}
+                for memory_id, result in zip(result_ids, response['results']):
+                    memory = existing_by_id.get(memory_id)
 
                     if result.get('event') == 'ADD':
                         if not memory:
-                            memory = Memory(
-                                id=memory_id,
-                                user_id=user.id,
-                                app_id=app.id,
-                                content=result.get('memory', text),
-                                state=MemoryState.active,
-                                created_at=datetime.datetime.now(datetime.UTC)
-                            )
-                            db.add(memory)
+                            new_rows.append({
+                                "id": memory_id,
+                                "user_id": user.id,
+                                "app_id": app.id,
+                                "content": result.get('memory', text),
+                                "state": MemoryState.active,
+                                "created_at": now,
+                            })
                         else:
                             memory.state = MemoryState.active
                             memory.content = result.get('memory', text)
-                            memory.updated_at = datetime.datetime.now(datetime.UTC)
 
                         # Create history entry
-                        history = MemoryStatusHistory(
-                            memory_id=memory_id,
-                            changed_by=user.id,
-                            old_state=MemoryState.deleted if memory else None,
-                            new_state=MemoryState.active,
-                            changed_at=datetime.datetime.now(datetime.UTC)
-                        )
-                        db.add(history)
+                        history_rows.append({
+                            "memory_id": memory_id,
+                            "changed_by": user.id,
+                            # The column is NOT NULL; new memories are recorded
+                            # as coming from deleted, as in the REST create path
+                            "old_state": MemoryState.deleted,
+                            "new_state": MemoryState.active,
+                            "changed_at": now,
+                        })
                         
                         memories_added.append({
-                            "id": str(memory_id),
+                            "id": memory_id,
                             "content": result.get('memory', text),
                             "event": "ADD"
                         })
@@ -161,33 +366,37 @@ async def add_memories(text: str) -> str:
                     elif result.get('event') == 'DELETE':
                         if memory:
                             memory.state = MemoryState.deleted
-                            memory.deleted_at = datetime.datetime.now(datetime.UTC)
+                            memory.deleted_at = now
                             # Create history entry
-                            history = MemoryStatusHistory(
-                                memory_id=memory_id,
-                                changed_by=user.id,
-                                old_state=MemoryState.active,
-                                new_state=MemoryState.deleted,
-                                changed_at=datetime.datetime.now(datetime.UTC)
-                            )
-                            db.add(history)
+                            history_rows.append({
+                                "memory_id": memory_id,
+                                "changed_by": user.id,
+                                "old_state": MemoryState.active,
+                                "new_state": MemoryState.deleted,
+                                "changed_at": now,
+                            })
                             
                             memories_added.append({
-                                "id": str(memory_id),
+                                "id": memory_id,
                                 "content": result.get('memory', text),
                                 "event": "DELETE"
                             })
 
-                db.commit()
+                # One multi-row INSERT each for the new memories and all
+                # history entries (the latter flushes the updates above)
+                await bulk_insert_memories_async(db, new_rows)
+                if history_rows:
+                    await db.execute(insert(MemoryStatusHistory), history_rows)
+                await db.commit()
                 
-                logger.info(f"✅ Successfully processed {len(memories_added)} memory operations")
+                logger.info("✅ Successfully processed %d memory operations", len(memories_added))
                 
-                return json.dumps({
+                return _jdumps({
                     "success": True,
                     "message": f"Successfully processed {len(memories_added)} memory operations",
                     "memories": memories_added,
                     "user_id": uid,
-                    "original_response": response
+                    **({"original_response": response} if INCLUDE_RAW_RESPONSE else {})
                 })
                 
             elif isinstance(response, dict):
@@ -200,7 +409,7 @@ async def add_memories(text: str) -> str:
                     app_id=app.id,
                     content=text,
                     state=MemoryState.active,
-                    created_at=datetime.datetime.now(datetime.UTC)
+                    created_at=now
                 )
                 db.add(memory)
                 
@@ -210,27 +419,27 @@ async def add_memories(text: str) -> str:
                     changed_by=user.id,
                     old_state=None,
                     new_state=MemoryState.active,
-                    changed_at=datetime.datetime.now(datetime.UTC)
+                    changed_at=now
                 )
                 db.add(history)
                 
-                db.commit()
+                await db.commit()
                 
-                logger.info(f"✅ Successfully added memory with ID {memory_id}")
+                logger.info("✅ Successfully added memory with ID %s", memory_id)
                 
-                return json.dumps({
+                return _jdumps({
                     "success": True,
                     "message": "Memory added successfully",
                     "memory": {
-                        "id": str(memory_id),
+                        "id": memory_id,
                         "content": text
                     },
                     "user_id": uid,
-                    "original_response": response
+                    **({"original_response": response} if INCLUDE_RAW_RESPONSE else {})
                 })
             else:
                 # Handle unexpected response format
-                logger.warning(f"⚠️ Unexpected response format: {type(response)}")
+                logger.warning("⚠️ Unexpected response format: %s", type(response))
                 
                 # Still create a database entry
                 memory_id = uuid.uuid4()
@@ -240,28 +449,26 @@ async def add_memories(text: str) -> str:
                     app_id=app.id,
                     content=text,
                     state=MemoryState.active,
-                    created_at=datetime.datetime.now(datetime.UTC)
+                    created_at=now
                 )
                 db.add(memory)
-                db.commit()
+                await db.commit()
                 
-                return json.dumps({
+                return _jdumps({
                     "success": True,
                     "message": "Memory added successfully (unknown response format)",
                     "memory": {
-                        "id": str(memory_id),
+                        "id": memory_id,
                         "content": text
                     },
                     "user_id": uid,
-                    "original_response": str(response)
+                    **({"original_response": str(response)} if INCLUDE_RAW_RESPONSE else {})
                 })
-
-        finally:
-            db.close()
             
     except Exception as e:
-        logger.exception(f"❌ Error adding memory: {e}")
-        return json.dumps({
+        logger.exception("❌ Error adding memory: %s", e)
+        _invalidate_on_connection_error(e)
+        return _jdumps({
             "error": f"Failed to add memory: {str(e)}",
             "success": False,
             "user_id": uid
@@ -274,32 +481,34 @@ async def search_memory(query: str) -> str:
     client_name = client_name_var.get(None)
     
     if not uid:
-        return json.dumps({"error": "user_id not provided", "results": []})
+        return _jdumps({"error": "user_id not provided", "results": []})
     if not client_name:
-        return json.dumps({"error": "client_name not provided", "results": []})
+        return _jdumps({"error": "client_name not provided", "results": []})
     if not query or not query.strip():
-        return json.dumps({"error": "query is required and cannot be empty", "results": []})
+        return _jdumps({"error": "query is required and cannot be empty", "results": []})
 
-    logger.info(f"🔍 Searching memories for user {uid}: '{query}'")
+    logger.info("🔍 Searching memories for user %s: '%s'", uid, query)
 
     # Get memory client safely
-    memory_client = get_memory_client_safe()
+    memory_client = await get_memory_client_safe()
     if not memory_client:
-        return json.dumps({"error": "Memory system is currently unavailable. Please try again later.", "results": []})
+        return _jdumps({"error": "Memory system is currently unavailable. Please try again later.", "results": []})
+
+    now = datetime.datetime.now(datetime.UTC)
 
     try:
-        db = SessionLocal()
-        try:
+        async with AsyncSessionLocal() as db:
             # Get or create user and app
-            user, app = get_user_and_app(db, user_id=uid, app_id=client_name)
+            user, app = await resolve_user_and_app_async(db, user_id=uid, app_id=client_name)
 
             # Try memory client search first
             try:
                 # Use memory client search with error handling
-                results = memory_client.search(
+                results = await asyncio.to_thread(
+                    memory_client.search,
                     query=query,
                     user_id=uid,
-                    limit=10
+                    limit=SEARCH_LIMIT
                 )
                 
                 # Handle different result formats
@@ -310,30 +519,31 @@ async def search_memory(query: str) -> str:
                 else:
                     search_results = []
                 
-                logger.info(f"✅ Memory client search found {len(search_results)} results")
+                logger.info("✅ Memory client search found %d results", len(search_results))
                 
                 # Log access for found memories
+                access_rows = []
                 for result in search_results:
                     if isinstance(result, dict) and 'id' in result:
                         try:
-                            memory_id = uuid.UUID(result['id'])
-                            access_log = MemoryAccessLog(
-                                memory_id=memory_id,
-                                app_id=app.id,
-                                access_type="search",
-                                metadata_={
+                            access_rows.append({
+                                "memory_id": uuid.UUID(result['id']),
+                                "app_id": app.id,
+                                "access_type": "search",
+                                "accessed_at": now,
+                                "metadata_": {
                                     "query": query,
                                     "score": result.get('score'),
                                     "method": "memory_client"
-                                }
-                            )
-                            db.add(access_log)
+                                },
+                            })
                         except (ValueError, KeyError) as e:
-                            logger.warning(f"Could not log access for result: {e}")
+                            logger.warning("Could not log access for result: %s", e)
                 
-                db.commit()
+                # Access logging is off the response path
+                _log_access_in_background(access_rows)
                 
-                return json.dumps({
+                return _jdumps({
                     "results": search_results,
                     "query": query,
                     "user_id": uid,
@@ -349,71 +559,85 @@ async def search_memory(query: str) -> str:
                         _ensure_qdrant_indexes()
                         logger.info("✅ Indexes created, retrying search...")
                     except Exception as index_error:
-                        logger.warning(f"Could not create indexes: {index_error}")
+                        logger.warning("Could not create indexes: %s", index_error)
                 
                 # Fallback to manual Qdrant search (your original code)
                 if hasattr(memory_client, 'vector_store') and hasattr(memory_client, 'embedding_model'):
                     try:
-                        # Get accessible memory IDs based on ACL
-                        user_memories = db.query(Memory).filter(Memory.user_id == user.id).all()
-                        accessible_memory_ids = [memory.id for memory in user_memories if check_memory_access_permissions(db, memory, app.id)]
-                        
-                        conditions = [qdrant_models.FieldCondition(key="user_id", match=qdrant_models.MatchValue(value=uid))]
-                        
-                        if accessible_memory_ids:
-                            # Convert UUIDs to strings for Qdrant
-                            accessible_memory_ids_str = [str(memory_id) for memory_id in accessible_memory_ids]
-                            conditions.append(qdrant_models.HasIdCondition(has_id=accessible_memory_ids_str))
-
-                        filters = qdrant_models.Filter(must=conditions)
-                        embeddings = memory_client.embedding_model.embed(query, "search")
-                        
-                        hits = memory_client.vector_store.client.query_points(
-                            collection_name=memory_client.vector_store.collection_name,
-                            query=embeddings,
-                            query_filter=filters,
-                            limit=10,
+                        # The query embedding and the ACL lookup are
+                        # independent, so overlap them.
+                        embeddings, acl_result = await asyncio.gather(
+                            asyncio.to_thread(_embed_cached, memory_client.embedding_model, query, "search"),
+                            db.execute(inaccessible_memory_ids_query(user.id, app.id)),
                         )
+                        excluded_ids = acl_result.scalars().all()
+                        filters = _user_search_filter(uid, excluded_ids)
+                        # Exclusions left out of the filter are dropped below
+                        unfiltered_ids = set(excluded_ids[MAX_EXCLUDED_IDS:])
+                        limit = SEARCH_LIMIT * SEARCH_OVERFETCH if unfiltered_ids else SEARCH_LIMIT
+                        
+                        async_qdrant = memory_utils.get_async_qdrant_client()
+                        if async_qdrant is not None:
+                            hits = await _search_batcher.search(
+                                async_qdrant,
+                                memory_client.vector_store.collection_name,
+                                query=embeddings,
+                                query_filter=filters,
+                                limit=limit,
+                            )
+                        else:
+                            hits = await asyncio.to_thread(
+                                memory_client.vector_store.client.query_points,
+                                collection_name=memory_client.vector_store.collection_name,
+                                query=embeddings,
+                                query_filter=filters,
+                                limit=limit,
+                            )
 
-                        # Process search results
-                        memories = hits.points
-                        memories = [
-                            {
-                                "id": memory.id,
-                                "memory": memory.payload["data"],
-                                "hash": memory.payload.get("hash"),
-                                "created_at": memory.payload.get("created_at"),
-                                "updated_at": memory.payload.get("updated_at"),
-                                "score": memory.score,
-                            }
-                            for memory in memories
-                        ]
-
-                        # Log memory access for each memory found
-                        for memory in memories:
-                            if 'id' in memory:
-                                try:
-                                    memory_id = uuid.UUID(memory['id'])
-                                    access_log = MemoryAccessLog(
-                                        memory_id=memory_id,
-                                        app_id=app.id,
-                                        access_type="search",
-                                        metadata_={
-                                            "query": query,
-                                            "score": memory.get('score'),
-                                            "hash": memory.get('hash'),
-                                            "method": "direct_qdrant"
-                                        }
-                                    )
-                                    db.add(access_log)
-                                except (ValueError, KeyError) as e:
-                                    logger.warning(f"Could not log access for memory: {e}")
+                        # Process search results. Point ids are parsed into
+                        # UUIDs once and reused for the access log and the
+                        # reply (orjson serializes them).
+                        memories = []
+                        access_rows = []
+                        for point in hits.points:
+                            if len(memories) == SEARCH_LIMIT:
+                                break
+                            try:
+                                memory_id = uuid.UUID(point.id)
+                            except (ValueError, TypeError, AttributeError) as e:
+                                logger.warning("Could not log access for memory: %s", e)
+                                memory_id = point.id
+                            else:
+                                if memory_id in unfiltered_ids:
+                                    continue
+                                access_rows.append({
+                                    "memory_id": memory_id,
+                                    "app_id": app.id,
+                                    "access_type": "search",
+                                    "accessed_at": now,
+                                    "metadata_": {
+                                        "query": query,
+                                        "score": point.score,
+                                        "hash": point.payload.get("hash"),
+                                        "method": "direct_qdrant"
+                                    },
+                                })
+                            payload = point.payload
+                            memories.append(SearchHit(
+                                memory_id,
+                                payload["data"],
+                                payload.get("hash"),
+                                payload.get("created_at"),
+                                payload.get("updated_at"),
+                                point.score,
+                            ))
                         
-                        db.commit()
+                        # Access logging is off the response path
+                        _log_access_in_background(access_rows)
                         
-                        logger.info(f"✅ Direct Qdrant search found {len(memories)} results")
+                        logger.info("✅ Direct Qdrant search found %d results", len(memories))
                         
-                        return json.dumps({
+                        return _jdumps({
                             "results": memories,
                             "query": query,
                             "user_id": uid,
@@ -422,10 +646,10 @@ async def search_memory(query: str) -> str:
                         })
                         
                     except Exception as qdrant_error:
-                        logger.error(f"❌ Direct Qdrant search also failed: {qdrant_error}")
+                        logger.error("❌ Direct Qdrant search also failed: %s", qdrant_error)
                         
                 # Final fallback: return empty results
-                return json.dumps({
+                return _jdumps({
                     "results": [],
                     "query": query,
                     "user_id": uid,
@@ -433,13 +657,11 @@ async def search_memory(query: str) -> str:
                     "method": "fallback",
                     "error": f"Search failed: {str(search_error)}"
                 })
-
-        finally:
-            db.close()
             
     except Exception as e:
-        logger.exception(f"❌ Error in search_memory: {e}")
-        return json.dumps({
+        logger.exception("❌ Error in search_memory: %s", e)
+        _invalidate_on_connection_error(e)
+        return _jdumps({
             "error": f"Search failed: {str(e)}",
             "results": [],
             "query": query,
@@ -453,30 +675,31 @@ async def list_memories() -> str:
     client_name = client_name_var.get(None)
     
     if not uid:
-        return json.dumps({"error": "user_id not provided", "memories": []})
+        return _jdumps({"error": "user_id not provided", "memories": []})
     if not client_name:
-        return json.dumps({"error": "client_name not provided", "memories": []})
+        return _jdumps({"error": "client_name not provided", "memories": []})
 
-    logger.info(f"📋 Listing memories for user {uid}")
+    logger.info("📋 Listing memories for user %s", uid)
 
     # Get memory client safely
-    memory_client = get_memory_client_safe()
+    memory_client = await get_memory_client_safe()
     if not memory_client:
-        return json.dumps({"error": "Memory system is currently unavailable. Please try again later.", "memories": []})
+        return _jdumps({"error": "Memory system is currently unavailable. Please try again later.", "memories": []})
+
+    now = datetime.datetime.now(datetime.UTC)
 
     try:
-        db = SessionLocal()
-        try:
+        async with AsyncSessionLocal() as db:
             # Get or create user and app
-            user, app = get_user_and_app(db, user_id=uid, app_id=client_name)
+            user, app = await resolve_user_and_app_async(db, user_id=uid, app_id=client_name)
 
             # Get all memories
-            memories = memory_client.get_all(user_id=uid)
+            memories = await asyncio.to_thread(memory_client.get_all, user_id=uid)
             filtered_memories = []
 
             # Filter memories based on permissions
-            user_memories = db.query(Memory).filter(Memory.user_id == user.id).all()
-            accessible_memory_ids = [memory.id for memory in user_memories if check_memory_access_permissions(db, memory, app.id)]
+            accessible_memory_ids = set((await db.execute(accessible_memory_ids_query(user.id, app.id))).scalars())
+            access_rows = []
             
             if isinstance(memories, dict) and 'results' in memories:
                 for memory_data in memories['results']:
@@ -485,55 +708,53 @@ async def list_memories() -> str:
                             memory_id = uuid.UUID(memory_data['id'])
                             if memory_id in accessible_memory_ids:
                                 # Create access log entry
-                                access_log = MemoryAccessLog(
-                                    memory_id=memory_id,
-                                    app_id=app.id,
-                                    access_type="list",
-                                    metadata_={
+                                access_rows.append({
+                                    "memory_id": memory_id,
+                                    "app_id": app.id,
+                                    "access_type": "list",
+                                    "accessed_at": now,
+                                    "metadata_": {
                                         "hash": memory_data.get('hash')
-                                    }
-                                )
-                                db.add(access_log)
+                                    },
+                                })
                                 filtered_memories.append(memory_data)
                         except ValueError as e:
-                            logger.warning(f"Invalid memory ID: {e}")
+                            logger.warning("Invalid memory ID: %s", e)
             else:
                 for memory in memories:
                     if isinstance(memory, dict) and 'id' in memory:
                         try:
                             memory_id = uuid.UUID(memory['id'])
-                            memory_obj = db.query(Memory).filter(Memory.id == memory_id).first()
-                            if memory_obj and check_memory_access_permissions(db, memory_obj, app.id):
+                            if memory_id in accessible_memory_ids:
                                 # Create access log entry
-                                access_log = MemoryAccessLog(
-                                    memory_id=memory_id,
-                                    app_id=app.id,
-                                    access_type="list",
-                                    metadata_={
+                                access_rows.append({
+                                    "memory_id": memory_id,
+                                    "app_id": app.id,
+                                    "access_type": "list",
+                                    "accessed_at": now,
+                                    "metadata_": {
                                         "hash": memory.get('hash')
-                                    }
-                                )
-                                db.add(access_log)
+                                    },
+                                })
                                 filtered_memories.append(memory)
                         except ValueError as e:
-                            logger.warning(f"Invalid memory ID: {e}")
+                            logger.warning("Invalid memory ID: %s", e)
             
-            db.commit()
+            # Access logging is off the response path
+            _log_access_in_background(access_rows)
             
-            logger.info(f"✅ Listed {len(filtered_memories)} accessible memories")
+            logger.info("✅ Listed %d accessible memories", len(filtered_memories))
             
-            return json.dumps({
+            return _jdumps({
                 "memories": filtered_memories,
                 "user_id": uid,
                 "count": len(filtered_memories)
             })
             
-        finally:
-            db.close()
-            
     except Exception as e:
-        logger.exception(f"❌ Error getting memories: {e}")
-        return json.dumps({
+        logger.exception("❌ Error getting memories: %s", e)
+        _invalidate_on_connection_error(e)
+        return _jdumps({
             "error": f"Failed to get memories: {str(e)}",
             "memories": [],
             "user_id": uid
@@ -546,80 +767,86 @@ async def delete_all_memories() -> str:
     client_name = client_name_var.get(None)
     
     if not uid:
-        return json.dumps({"error": "user_id not provided", "success": False})
+        return _jdumps({"error": "user_id not provided", "success": False})
     if not client_name:
-        return json.dumps({"error": "client_name not provided", "success": False})
+        return _jdumps({"error": "client_name not provided", "success": False})
 
-    logger.info(f"🗑️ Deleting all memories for user {uid}")
+    logger.info("🗑️ Deleting all memories for user %s", uid)
 
     # Get memory client safely
-    memory_client = get_memory_client_safe()
+    memory_client = await get_memory_client_safe()
     if not memory_client:
-        return json.dumps({"error": "Memory system is currently unavailable. Please try again later.", "success": False})
+        return _jdumps({"error": "Memory system is currently unavailable. Please try again later.", "success": False})
+
+    now = datetime.datetime.now(datetime.UTC)
 
     try:
-        db = SessionLocal()
-        try:
+        async with AsyncSessionLocal() as db:
             # Get or create user and app
-            user, app = get_user_and_app(db, user_id=uid, app_id=client_name)
+            user, app = await resolve_user_and_app_async(db, user_id=uid, app_id=client_name)
 
-            user_memories = db.query(Memory).filter(Memory.user_id == user.id).all()
-            accessible_memory_ids = [memory.id for memory in user_memories if check_memory_access_permissions(db, memory, app.id)]
+            accessible_memories = (await db.execute(accessible_memories_query(user.id, app.id))).scalars().all()
+            accessible_memory_ids = [memory.id for memory in accessible_memories]
 
+            # delete the accessible memories only; the vector store deletes
+            # are independent round-trips, so run them concurrently
+            delete_results = await asyncio.gather(
+                *(asyncio.to_thread(memory_client.delete, memory_id) for memory_id in accessible_memory_ids),
+                return_exceptions=True,
+            )
             deleted_count = 0
-            # delete the accessible memories only
-            for memory_id in accessible_memory_ids:
-                try:
-                    memory_client.delete(memory_id)
+            for memory_id, delete_result in zip(accessible_memory_ids, delete_results):
+                if isinstance(delete_result, Exception):
+                    logger.warning("Failed to delete memory %s from vector store: %s", memory_id, delete_result)
+                else:
                     deleted_count += 1
-                except Exception as delete_error:
-                    logger.warning(f"Failed to delete memory {memory_id} from vector store: {delete_error}")
 
             # Update each memory's state and create history entries
-            now = datetime.datetime.now(datetime.UTC)
-            for memory_id in accessible_memory_ids:
-                memory = db.query(Memory).filter(Memory.id == memory_id).first()
-                if memory:
-                    # Update memory state
-                    memory.state = MemoryState.deleted
-                    memory.deleted_at = now
-
-                    # Create history entry
-                    history = MemoryStatusHistory(
-                        memory_id=memory_id,
-                        changed_by=user.id,
-                        old_state=MemoryState.active,
-                        new_state=MemoryState.deleted,
-                        changed_at=now
-                    )
-                    db.add(history)
-
-                    # Create access log entry
-                    access_log = MemoryAccessLog(
-                        memory_id=memory_id,
-                        app_id=app.id,
-                        access_type="delete_all",
-                        metadata_={"operation": "bulk_delete"}
-                    )
-                    db.add(access_log)
-
-            db.commit()
+            history_rows = []
+            access_rows = []
+            for memory in accessible_memories:
+                # Update memory state
+                memory.state = MemoryState.deleted
+                memory.deleted_at = now
+
+                # Create history entry
+                history_rows.append({
+                    "memory_id": memory.id,
+                    "changed_by": user.id,
+                    "old_state": MemoryState.active,
+                    "new_state": MemoryState.deleted,
+                    "changed_at": now,
+                })
+
+                # Create access log entry
+                access_rows.append({
+                    "memory_id": memory.id,
+                    "app_id": app.id,
+                    "access_type": "delete_all",
+                    "accessed_at": now,
+                    "metadata_": {"operation": "bulk_delete"},
+                })
+
+            # Two multi-row INSERTs instead of two INSERTs per memory
+            if history_rows:
+                await db.execute(insert(MemoryStatusHistory), history_rows)
+            if access_rows:
+                await db.execute(insert(MemoryAccessLog), access_rows)
+            await db.commit()
             
-            logger.info(f"✅ Successfully deleted {len(accessible_memory_ids)} memories")
+            logger.info("✅ Successfully deleted %d memories", len(accessible_memory_ids))
             
-            return json.dumps({
+            return _jdumps({
                 "success": True,
                 "message": f"Successfully deleted {len(accessible_memory_ids)} memories",
                 "deleted_count": len(accessible_memory_ids),
                 "user_id": uid
             })
             
-        finally:
-            db.close()
-            
     except Exception as e:
-        logger.exception(f"❌ Error deleting memories: {e}")
-        return json.dumps({
+        logger.exception("❌ Error deleting memories: %s", e)
+        _invalidate_on_connection_error(e)
+        return _jdumps({
             "error": f"Failed to delete memories: {str(e)}",
             "success": False,
             "user_id": uid
@@ -653,37 +880,22 @@ async def handle_sse(request: Request):
         client_name_var.reset(client_token)
 
 
-@mcp_router.post("/messages/")
-async def handle_get_message(request: Request):
-    return await handle_post_message(request)
+async def _discard_send(message):
+    # The transport writes its own 202 response; the route returns ours instead
+    return None
 
 
+@mcp_router.post("/messages/")
 @mcp_router.post("/{client_name}/sse/{user_id}/messages/")
-async def handle_post_message(request: Request):
-    return await handle_post_message(request)
-
 async def handle_post_message(request: Request):
     """Handle POST messages for SSE"""
-    try:
-        body = await request.body()
-
-        # Create a simple receive function that returns the body
-        async def receive():
-            return {"type": "http.request", "body": body, "more_body": False}
+    # Hand the transport the live ASGI receive channel so it reads the body
+    # itself instead of us buffering it into a replay closure first
+    await sse.handle_post_message(request.scope, request.receive, _discard_send)
 
-        # Create a simple send function that does nothing
-        async def send(message):
-            return {}
+    # Return a success response
+    return {"status": "ok"}
 
-        # Call handle_post_message with the correct arguments
-        await sse.handle_post_message(request.scope, receive, send)
-
-        # Return a success response
-        return {"status": "ok"}
-    finally:
-        pass
-        # Clean up context variable
-        # client_name_var.reset(client_token)
 
 def setup_mcp_server(app: FastAPI):
     """Setup MCP server with the FastAPI application"""
@@ -1,16 +1,31 @@
 import enum
+import logging
+import os
+import time
 import uuid
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache
+from tenacity import Retrying, stop_after_attempt, wait_exponential
 import sqlalchemy as sa
 from sqlalchemy import (
     Column, String, Boolean, ForeignKey, Enum, Table,
-    DateTime, JSON, Integer, Index, event, Text
+    DateTime, JSON, Integer, Index, event, Text, DDL, FetchedValue, func, CheckConstraint
 )
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
-from app.database import Base
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import relationship, object_session
+from pgvector.sqlalchemy import Vector
+from app.database import Base, SessionLocal
 from sqlalchemy.orm import Session
-from app.utils.categorization import get_categories_for_memory
+from app.utils.categorization import get_categories_for_memory, get_categories_for_memories
+
+logger = logging.getLogger(__name__)
+
+
+# Width of Memory.vector; must match the embedder's output size
+EMBEDDING_DIMS = int(os.getenv("EMBEDDING_DIMS", "1536"))
 
 
 def get_current_utc_time():
@@ -18,6 +33,23 @@ def get_current_utc_time():
     return datetime.datetime.now(datetime.UTC)
 
 
+def uuid7() -> uuid.UUID:
+    """Generate a time-ordered UUIDv7 (RFC 9562).
+
+    The leading 48 bits are a millisecond timestamp, so new primary keys land
+    on the rightmost btree leaf instead of a random page as with uuid4.
+    """
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                          # version
+        | (rand >> 62 & 0xFFF) << 64         # rand_a
+        | 0b10 << 62                         # variant
+        | rand & 0x3FFF_FFFF_FFFF_FFFF       # rand_b
+    )
+    return uuid.UUID(int=value)
+
+
 class MemoryState(enum.Enum):
     active = "active"
     paused = "paused"
@@ -25,18 +57,23 @@ class MemoryState(enum.Enum):
     deleted = "deleted"
 
 
+# One type object shared by every state column, so the Postgres type is
+# created and reflected once
+memory_state_enum = Enum(MemoryState, name='memory_state_enum')
+
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(String, nullable=False, unique=True, index=True)
     name = Column(String, nullable=True, index=True)
     email = Column(String, unique=True, nullable=True, index=True)
     metadata_ = Column('metadata', JSON, default=dict)
-    created_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True),
-                        default=get_current_utc_time,
-                        onupdate=get_current_utc_time)
+                        server_default=func.now(),
+                        server_onupdate=FetchedValue())
 
     # Relationships
     apps = relationship("App", back_populates="owner", cascade="all, delete-orphan")
@@ -46,16 +83,16 @@ class User(Base):
 class App(Base):
     __tablename__ = "apps"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False, index=True)
     description = Column(Text)
     metadata_ = Column('metadata', JSON, default=dict)
     is_active = Column(Boolean, default=True, index=True)
-    created_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True),
-                        default=get_current_utc_time,
-                        onupdate=get_current_utc_time)
+                        server_default=func.now(),
+                        server_onupdate=FetchedValue())
 
     # Relationships
     owner = relationship("User", back_populates="apps")
@@ -69,29 +106,29 @@ class App(Base):
 class Config(Base):
     __tablename__ = "configs"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     key = Column(String, unique=True, nullable=False, index=True)
     value = Column(JSON, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=get_current_utc_time)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
-                        default=get_current_utc_time,
-                        onupdate=get_current_utc_time)
+                        server_default=func.now(),
+                        server_onupdate=FetchedValue())
 
 
 class Memory(Base):
     __tablename__ = "memories"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    app_id = Column(UUID(as_uuid=True), ForeignKey("apps.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    app_id = Column(UUID(as_uuid=True), ForeignKey("apps.id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)  # Use Text for longer content
-    vector = Column(Text)  # Store vector embeddings as text/JSON
-    metadata_ = Column('metadata', JSON, default=dict)
-    state = Column(Enum(MemoryState, name='memory_state_enum'), default=MemoryState.active, index=True)
-    created_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
+    vector = Column(Vector(EMBEDDING_DIMS).with_variant(Text, 'sqlite'))  # Native pgvector embedding
+    metadata_ = Column('metadata', JSON().with_variant(JSONB(), 'postgresql'), default=dict)
+    state = Column(memory_state_enum, default=MemoryState.active, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True),
-                        default=get_current_utc_time,
-                        onupdate=get_current_utc_time)
+                        server_default=func.now(),
+                        server_onupdate=FetchedValue())
     archived_at = Column(DateTime(timezone=True), nullable=True, index=True)
     deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)
 
@@ -101,24 +138,28 @@ class Memory(Base):
     categories = relationship("Category", secondary="memory_categories", back_populates="memories")
 
     __table_args__ = (
-        Index('idx_memory_user_state', 'user_id', 'state'),
         Index('idx_memory_app_state', 'app_id', 'state'),
         Index('idx_memory_user_app', 'user_id', 'app_id'),
-        Index('idx_memory_created_at', 'created_at'),
+        Index('idx_memory_user_app_active', 'user_id', 'app_id', postgresql_where=sa.text("state = 'active'")),
+        Index('idx_memory_created_brin', 'created_at', postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
+        Index('idx_memory_updated_brin', 'updated_at', postgresql_using='brin', postgresql_with={'pages_per_range': 32}),
         Index('idx_memory_content_search', 'content', postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}),
+        Index('idx_memory_metadata_gin', 'metadata', postgresql_using='gin'),
+        Index('idx_memory_vector_hnsw', 'vector', postgresql_using='hnsw',
+              postgresql_ops={'vector': 'vector_cosine_ops'}),
     )
 
 
 class Category(Base):
     __tablename__ = "categories"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     name = Column(String, unique=True, nullable=False, index=True)
     description = Column(Text)
-    created_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True),
-                        default=get_current_utc_time,
-                        onupdate=get_current_utc_time)
+                        server_default=func.now(),
+                        server_onupdate=FetchedValue())
 
     # Relationships
     memories = relationship("Memory", secondary="memory_categories", back_populates="categories")
@@ -127,22 +168,21 @@ class Category(Base):
 # Association table for many-to-many relationship between Memory and Category
 memory_categories = Table(
     "memory_categories", Base.metadata,
-    Column("memory_id", UUID(as_uuid=True), ForeignKey("memories.id", ondelete="CASCADE"), primary_key=True, index=True),
+    Column("memory_id", UUID(as_uuid=True), ForeignKey("memories.id", ondelete="CASCADE"), primary_key=True),
     Column("category_id", UUID(as_uuid=True), ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True, index=True),
-    Index('idx_memory_category', 'memory_id', 'category_id')
 )
 
 
 class AccessControl(Base):
     __tablename__ = "access_controls"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     subject_type = Column(String, nullable=False, index=True)  # 'user', 'app', etc.
     subject_id = Column(UUID(as_uuid=True), nullable=True, index=True)
     object_type = Column(String, nullable=False, index=True)   # 'memory', 'category', etc.
     object_id = Column(UUID(as_uuid=True), nullable=True, index=True)
-    effect = Column(String, nullable=False, index=True)        # 'allow', 'deny'
-    created_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
+    effect = Column(Enum('allow', 'deny', name='ac_effect'), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     __table_args__ = (
         Index('idx_access_subject', 'subject_type', 'subject_id'),
@@ -154,11 +194,11 @@ class AccessControl(Base):
 class ArchivePolicy(Base):
     __tablename__ = "archive_policies"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     criteria_type = Column(String, nullable=False, index=True)  # 'user', 'app', 'category'
     criteria_id = Column(UUID(as_uuid=True), nullable=True, index=True)
     days_to_archive = Column(Integer, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     __table_args__ = (
         Index('idx_policy_criteria', 'criteria_type', 'criteria_id'),
@@ -168,12 +208,12 @@ class ArchivePolicy(Base):
 class MemoryStatusHistory(Base):
     __tablename__ = "memory_status_history"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    memory_id = Column(UUID(as_uuid=True), ForeignKey("memories.id", ondelete="CASCADE"), nullable=False, index=True)
-    changed_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
-    old_state = Column(Enum(MemoryState, name='memory_state_enum'), nullable=False, index=True)
-    new_state = Column(Enum(MemoryState, name='memory_state_enum'), nullable=False, index=True)
-    changed_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    memory_id = Column(UUID(as_uuid=True), ForeignKey("memories.id", ondelete="CASCADE"), nullable=False)
+    changed_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    old_state = Column(memory_state_enum, nullable=False, index=True)
+    new_state = Column(memory_state_enum, nullable=False, index=True)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
     reason = Column(Text, nullable=True)  # Optional reason for state change
 
     __table_args__ = (
@@ -186,85 +226,256 @@ class MemoryStatusHistory(Base):
 class MemoryAccessLog(Base):
     __tablename__ = "memory_access_logs"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    memory_id = Column(UUID(as_uuid=True), ForeignKey("memories.id", ondelete="CASCADE"), nullable=False, index=True)
-    app_id = Column(UUID(as_uuid=True), ForeignKey("apps.id", ondelete="SET NULL"), nullable=True, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
-    accessed_at = Column(DateTime(timezone=True), default=get_current_utc_time, index=True)
-    access_type = Column(String, nullable=False, index=True)  # 'read', 'write', 'delete', etc.
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    memory_id = Column(UUID(as_uuid=True), ForeignKey("memories.id", ondelete="CASCADE"), nullable=False)
+    app_id = Column(UUID(as_uuid=True), ForeignKey("apps.id", ondelete="SET NULL"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # Partition key, so it has to be part of the primary key on Postgres
+    accessed_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
+    access_type = Column(String, nullable=False)  # 'read', 'write', 'delete', etc.
     ip_address = Column(String, nullable=True)
     user_agent = Column(Text, nullable=True)
-    metadata_ = Column('metadata', JSON, default=dict)
+    metadata_ = Column('metadata', JSON, default=dict, server_default='{}', nullable=False)
 
     __table_args__ = (
+        CheckConstraint(
+            "access_type IN ('read', 'write', 'update', 'delete', 'search', 'list', 'delete_all')",
+            name='check_access_type'
+        ),
         Index('idx_access_memory_time', 'memory_id', 'accessed_at'),
         Index('idx_access_app_time', 'app_id', 'accessed_at'),
         Index('idx_access_user_time', 'user_id', 'accessed_at'),
         Index('idx_access_type_time', 'access_type', 'accessed_at'),
+        {'postgresql_partition_by': 'RANGE (accessed_at)'},
     )
 
 
+# Monthly partitions are added by ensure_access_log_partitions(); the default
+# partition catches anything outside them.
+event.listen(MemoryAccessLog.__table__, "after_create", DDL(
+    "CREATE TABLE IF NOT EXISTS memory_access_logs_default "
+    "PARTITION OF memory_access_logs DEFAULT"
+).execute_if(dialect="postgresql"))
+
+
+class CategorizationFailure(Base):
+    """Dead-letter record for memories whose categorization gave up."""
+    __tablename__ = "categorization_failures"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    memory_id = Column(UUID(as_uuid=True), ForeignKey("memories.id", ondelete="CASCADE"), nullable=False, index=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False)
+    failed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# updated_at is maintained by the database rather than stamped from Python on
+# every UPDATE. The Alembic migrations install the same trigger; these DDL
+# hooks cover databases built with Base.metadata.create_all().
+_update_updated_at_function = DDL("""
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ language 'plpgsql'
+""")
+event.listen(Base.metadata, "before_create", _update_updated_at_function.execute_if(dialect="postgresql"))
+
+
+def _touch_updated_at_on_update(table):
+    """Attach a trigger that refreshes ``updated_at`` whenever a row changes."""
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER update_{table.name}_updated_at "
+        f"BEFORE UPDATE ON {table.name} "
+        "FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()"
+    ).execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER IF NOT EXISTS update_{table.name}_updated_at "
+        f"AFTER UPDATE ON {table.name} FOR EACH ROW "
+        "WHEN NEW.updated_at IS OLD.updated_at "
+        f"BEGIN UPDATE {table.name} SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id; END"
+    ).execute_if(dialect="sqlite"))
+
+
+for _table in (User.__table__, App.__table__, Config.__table__, Memory.__table__, Category.__table__):
+    _touch_updated_at_on_update(_table)
+
+
+# Category name -> id. Names repeat across nearly every memory ("work",
+# "personal", ...), so hot names resolve without touching categories.
+_category_id_cache: LRUCache = LRUCache(maxsize=1024)
+_category_id_cache_lock = threading.Lock()
+
+
+def _conflict_insert(db: Session):
+    """Dialect insert() construct that supports ON CONFLICT (Postgres / SQLite)."""
+    dialect = db.get_bind().dialect.name
+    return postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+
+def _store_categories(db: Session, memory_id, categories) -> None:
+    """Create any missing categories and link them to a memory, then commit."""
+    try:
+        categories = list(dict.fromkeys(categories))
+        if not categories:
+            return
+
+        insert = _conflict_insert(db)
+
+        with _category_id_cache_lock:
+            category_ids = [_category_id_cache[name] for name in categories if name in _category_id_cache]
+            missing = [name for name in categories if name not in _category_id_cache]
+
+        if missing:
+            # Create any missing categories in one statement; existing names
+            # are left untouched and only newly inserted rows come back
+            resolved = db.execute(
+                insert(Category)
+                .on_conflict_do_nothing(index_elements=["name"])
+                .returning(Category.name, Category.id),
+                [
+                    {"name": name, "description": f"Automatically created category for {name}"}
+                    for name in missing
+                ]
+            ).all()
+            existing = set(missing).difference(name for name, _ in resolved)
+            if existing:
+                resolved.extend(db.execute(
+                    sa.select(Category.name, Category.id).where(Category.name.in_(existing))
+                ).all())
+            with _category_id_cache_lock:
+                _category_id_cache.update(resolved)
+            category_ids.extend(category_id for _, category_id in resolved)
+
+        # Link them all at once; pairs that already exist hit the primary key
+        db.execute(
+            insert(memory_categories).on_conflict_do_nothing(),
+            [{"memory_id": memory_id, "category_id": category_id} for category_id in category_ids]
+        )
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        # A cached id may point at a category that no longer exists
+        with _category_id_cache_lock:
+            _category_id_cache.clear()
+        raise
+
+
 def categorize_memory(memory: Memory, db: Session) -> None:
     """Categorize a memory using OpenAI and store the categories in the database."""
     try:
-        # Get categories from OpenAI
-        categories = get_categories_for_memory(memory.content)
-
-        # Get or create categories in the database
-        for category_name in categories:
-            category = db.query(Category).filter(Category.name == category_name).first()
-            if not category:
-                category = Category(
-                    name=category_name,
-                    description=f"Automatically created category for {category_name}"
-                )
-                db.add(category)
-                db.flush()  # Flush to get the category ID
-
-            # Check if the memory-category association already exists
-            existing = db.execute(
-                memory_categories.select().where(
-                    (memory_categories.c.memory_id == memory.id) &
-                    (memory_categories.c.category_id == category.id)
-                )
-            ).first()
-
-            if not existing:
-                # Create the association
-                db.execute(
-                    memory_categories.insert().values(
-                        memory_id=memory.id,
-                        category_id=category.id
-                    )
-                )
+        _store_categories(db, memory.id, get_categories_for_memory(memory.content))
+    except Exception:
+        logger.exception("Error categorizing memory %s", memory.id)
+
+
+# Attempts per queued batch before its memories are written to
+# categorization_failures. Retries are cheap: categories already fetched are
+# served from the content-hash cache and the inserts are idempotent.
+CATEGORIZATION_ATTEMPTS = 5
 
+
+def _categorize_memories_once(memory_ids) -> None:
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            sa.select(Memory.id, Memory.content).where(Memory.id.in_(memory_ids))
+        ).all()
+        if not rows:
+            return
+        db.rollback()  # don't hold the read snapshot open across the LLM call
+        results = get_categories_for_memories([content for _, content in rows])
+        for (memory_id, _), categories in zip(rows, results):
+            _store_categories(db, memory_id, categories)
+    finally:
+        db.close()
+
+
+def _record_categorization_failures(memory_ids, error: Exception) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            sa.insert(CategorizationFailure),
+            [
+                {"id": uuid7(), "memory_id": memory_id, "error": repr(error),
+                 "attempts": CATEGORIZATION_ATTEMPTS}
+                for memory_id in memory_ids
+            ]
+        )
         db.commit()
-    except Exception as e:
+    except Exception:
         db.rollback()
-        print(f"Error categorizing memory: {e}")
+        logger.exception("Could not record categorization failures for %s", list(memory_ids))
+    finally:
+        db.close()
 
 
-@event.listens_for(Memory, 'after_insert')
-def after_memory_insert(mapper, connection, target):
-    """Trigger categorization after a memory is inserted."""
+def categorize_memories(memory_ids) -> None:
+    """Categorize a batch of committed memories with batched LLM requests.
+
+    This is the only retry layer for categorization: the LLM helpers make a
+    single attempt each. Retried as a whole; on terminal failure the
+    memories are recorded in categorization_failures for later replay.
+    Never raises.
+    """
     try:
-        db = Session(bind=connection)
-        categorize_memory(target, db)
+        for attempt in Retrying(
+            stop=stop_after_attempt(CATEGORIZATION_ATTEMPTS),
+            wait=wait_exponential(multiplier=1, min=2, max=60),
+            reraise=True
+        ):
+            with attempt:
+                _categorize_memories_once(memory_ids)
     except Exception as e:
-        print(f"Error in after_memory_insert: {e}")
-    finally:
-        if 'db' in locals():
-            db.close()
+        logger.exception("Giving up categorizing %d memories", len(memory_ids))
+        _record_categorization_failures(memory_ids, e)
+
+
+# Categorization costs an LLM round-trip per memory, so it must not run
+# inside the flush that writes the memory. The mapper hooks only note which
+# memories need it on the owning session; once that session commits, the
+# batch is handed to a small worker pool.
+_categorization_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="categorize")
+
+
+def queue_categorization(session: Session, memory_ids) -> None:
+    """Categorize memories once session commits.
+
+    For memories written with Core statements, which bypass the mapper
+    hooks below.
+    """
+    session.info.setdefault("pending_categorization", set()).update(memory_ids)
+
+
+def _queue_categorization(target):
+    session = object_session(target)
+    if session is not None:
+        queue_categorization(session, [target.id])
+
+
+@event.listens_for(Memory, 'after_insert')
+def after_memory_insert(mapper, connection, target):
+    """Queue categorization after a memory is inserted."""
+    _queue_categorization(target)
 
 
 @event.listens_for(Memory, 'after_update')
 def after_memory_update(mapper, connection, target):
-    """Trigger categorization after a memory is updated."""
-    try:
-        db = Session(bind=connection)
-        categorize_memory(target, db)
-    except Exception as e:
-        print(f"Error in after_memory_update: {e}")
-    finally:
-        if 'db' in locals():
-            db.close()
+    """Queue categorization after a memory's content is updated."""
+    if sa.inspect(target).attrs.content.history.has_changes():
+        _queue_categorization(target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _categorize_after_commit(session):
+    memory_ids = session.info.pop("pending_categorization", None)
+    if memory_ids:
+        _categorization_executor.submit(categorize_memories, list(memory_ids))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_categorization(session):
+    session.info.pop("pending_categorization", None)
@@ -1,7 +1,7 @@
 from typing import Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func, desc
 
 from app.database import get_db
@@ -136,7 +136,7 @@ async def list_app_memories(
         Memory.state.in_([MemoryState.active, MemoryState.paused, MemoryState.archived])
     )
     # Add eager loading for categories
-    query = query.options(joinedload(Memory.categories))
+    query = query.options(selectinload(Memory.categories))
     total = query.count()
     memories = query.order_by(Memory.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
 
@@ -182,8 +182,8 @@ async def list_app_accessed_memories(
         desc("access_count")
     )
 
-    # Add eager loading for categories
-    query = query.options(joinedload(Memory.categories))
+    # Add eager loading for categories and apps
+    query = query.options(selectinload(Memory.categories), selectinload(Memory.app))
 
     total = query.count()
     results = query.offset((page - 1) * page_size).limit(page_size).all()
@@ -113,7 +113,6 @@ def save_config_to_db(db: Session, config: Dict[str, Any], key: str = "main"):
     
     if db_config:
         db_config.value = config
-        db_config.updated_at = None  # Will trigger the onupdate to set current time
     else:
         db_config = ConfigModel(key=key, value=config)
         db.add(db_config)
@@ -1,15 +1,16 @@
+import asyncio
 from datetime import datetime, UTC
 from typing import List, Optional, Set
 from uuid import UUID, uuid4
 import logging
 import os
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, selectinload
 from fastapi_pagination import Page, Params
 from fastapi_pagination.ext.sqlalchemy import paginate as sqlalchemy_paginate
 from pydantic import BaseModel
 from sqlalchemy import or_, func
-from app.utils.memory import get_memory_client
+from app.utils.memory import get_memory_client_async
 
 from app.database import get_db
 from app.models import (
@@ -17,7 +18,8 @@ from app.models import (
     MemoryStatusHistory, User, Category, AccessControl, Config as ConfigModel
 )
 from app.schemas import MemoryResponse, PaginatedMemoryResponse
-from app.utils.permissions import check_memory_access_permissions
+from app.utils.permissions import memory_access_clause
+from app.utils.db import copy_memories, get_user_and_app
 
 router = APIRouter(prefix="/api/v1/memories", tags=["memories"])
 
@@ -130,6 +132,10 @@ async def list_memories(
     if app_id:
         query = query.filter(Memory.app_id == app_id)
 
+    # Only return memories the app may access; evaluated in SQL so the page
+    # and its total are computed over accessible rows.
+    query = query.filter(memory_access_clause(app_id))
+
     if from_date:
         from_datetime = datetime.fromtimestamp(from_date, tz=UTC)
         query = query.filter(Memory.created_at >= from_datetime)
@@ -154,20 +160,11 @@ async def list_memories(
             query = query.order_by(sort_field.desc()) if sort_direction == "desc" else query.order_by(sort_field.asc())
 
 
-    # Get paginated results
-    paginated_results = sqlalchemy_paginate(query, params)
-
-    # Filter results based on permissions
-    filtered_items = []
-    for item in paginated_results.items:
-        if check_memory_access_permissions(db, item, app_id):
-            filtered_items.append(item)
-
-    # Update paginated results with filtered items
-    paginated_results.items = filtered_items
-    paginated_results.total = len(filtered_items)
+    # Load categories and apps for the page in two queries instead of one per row
+    query = query.options(selectinload(Memory.categories), selectinload(Memory.app))
 
-    return paginated_results
+    # Get paginated results
+    return sqlalchemy_paginate(query, params)
 
 
 # Get all categories
@@ -181,12 +178,11 @@ async def get_categories(
         raise HTTPException(status_code=404, detail="User not found")
 
     # Get unique categories associated with the user's memories
-    # Get all memories
-    memories = db.query(Memory).filter(Memory.user_id == user.id, Memory.state != MemoryState.deleted, Memory.state != MemoryState.archived).all()
-    # Get all categories from memories
-    categories = [category for memory in memories for category in memory.categories]
-    # Get unique categories
-    unique_categories = list(set(categories))
+    unique_categories = db.query(Category).join(Category.memories).filter(
+        Memory.user_id == user.id,
+        Memory.state != MemoryState.deleted,
+        Memory.state != MemoryState.archived
+    ).distinct().all()
 
     return {
         "categories": unique_categories,
@@ -225,15 +221,15 @@ async def create_memory(
         raise HTTPException(status_code=403, detail=f"App {request.app} is currently paused on OpenMemory. Cannot create new memories.")
 
     # Log what we're about to do
-    logging.info(f"Creating memory for user_id: {request.user_id} with app: {request.app}")
+    logging.info("Creating memory for user_id: %s with app: %s", request.user_id, request.app)
     
     # Try to get memory client safely
     try:
-        memory_client = get_memory_client()
+        memory_client = await get_memory_client_async()
         if not memory_client:
             raise Exception("Memory client is not available")
     except Exception as client_error:
-        logging.warning(f"Memory client unavailable: {client_error}. Creating memory in database only.")
+        logging.warning("Memory client unavailable: %s. Creating memory in database only.", client_error)
         # Return a json response with the error
         return {
             "error": str(client_error)
@@ -251,7 +247,7 @@ async def create_memory(
         )
         
         # Log the response for debugging
-        logging.info(f"Qdrant response: {qdrant_response}")
+        logging.info("Qdrant response: %s", qdrant_response)
         
         # Process Qdrant response
         if isinstance(qdrant_response, dict) and 'results' in qdrant_response:
@@ -293,7 +289,7 @@ async def create_memory(
                     db.refresh(memory)
                     return memory
     except Exception as qdrant_error:
-        logging.warning(f"Qdrant operation failed: {qdrant_error}.")
+        logging.warning("Qdrant operation failed: %s.", qdrant_error)
         # Return a json response with the error
         return {
             "error": str(qdrant_error)
@@ -302,6 +298,61 @@ async def create_memory(
 
 
 
+class ImportedMemory(BaseModel):
+    text: str
+    metadata: dict = {}
+    created_at: Optional[datetime] = None
+
+
+class ImportMemoriesRequest(BaseModel):
+    user_id: str
+    app: str = "openmemory"
+    memories: List[ImportedMemory]
+
+
+# Bulk import memories, e.g. when migrating from another store
+@router.post("/import")
+async def import_memories(
+    request: ImportMemoriesRequest,
+    db: Session = Depends(get_db)
+):
+    user, app_obj = get_user_and_app(db, request.user_id, request.app)
+    if not app_obj.is_active:
+        raise HTTPException(status_code=403, detail=f"App {request.app} is currently paused on OpenMemory. Cannot create new memories.")
+    if not request.memories:
+        return {"imported": 0, "ids": []}
+
+    memory_client = await get_memory_client_async()
+    if not memory_client:
+        raise HTTPException(status_code=503, detail="Memory client is not available")
+
+    # infer=False stores each text as given: one embedding per memory and
+    # no fact-extraction call. Results come back in input order.
+    response = await asyncio.to_thread(
+        memory_client.add,
+        [{"role": "user", "content": memory.text} for memory in request.memories],
+        user_id=request.user_id,
+        metadata={"source_app": "openmemory", "mcp_client": request.app, "app_id": str(app_obj.id)},
+        infer=False
+    )
+    results = response.get("results", []) if isinstance(response, dict) else response
+
+    # The rows are written with COPY and categorized in one batch afterwards
+    ids = copy_memories(db, [
+        {
+            "id": UUID(result["id"]),
+            "user_id": user.id,
+            "app_id": app_obj.id,
+            "content": memory.text,
+            "metadata_": memory.metadata,
+            "created_at": memory.created_at,
+        }
+        for memory, result in zip(request.memories, results)
+    ])
+    db.commit()
+    return {"imported": len(ids), "ids": ids}
+
+
 # Get memory by ID
 @router.get("/{memory_id}")
 async def get_memory(
@@ -561,9 +612,10 @@ async def filter_memories(
         # Default sorting
         query = query.order_by(Memory.created_at.desc())
 
-    # Add eager loading for categories and make the query distinct
+    # Add eager loading for categories and apps and make the query distinct
     query = query.options(
-        joinedload(Memory.categories)
+        selectinload(Memory.categories),
+        selectinload(Memory.app)
     ).distinct(Memory.id)
 
     # Use fastapi-pagination's paginate function
@@ -615,8 +667,8 @@ async def get_related_memories(
     ).join(Memory.categories).filter(
         Category.id.in_(category_ids)
     ).options(
-        joinedload(Memory.categories),
-        joinedload(Memory.app)
+        selectinload(Memory.categories),
+        selectinload(Memory.app)
     ).order_by(
         func.count(Category.id).desc(),
         Memory.created_at.desc()
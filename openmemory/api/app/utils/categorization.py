@@ -1,22 +1,67 @@
+import asyncio
+import hashlib
+import json
 import logging
-from typing import List
+import os
+import threading
+from typing import List, Optional
 
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
-from app.utils.prompts import MEMORY_CATEGORIZATION_PROMPT
+from app.utils.prompts import MEMORY_CATEGORIZATION_PROMPT, MEMORY_BATCH_CATEGORIZATION_PROMPT
 
 load_dotenv()
 openai_client = OpenAI()
 
+# Memories sent per batched categorization request
+CATEGORIZATION_BATCH_SIZE = int(os.getenv("CATEGORIZATION_BATCH_SIZE", "20"))
+# Set to "false" to categorize with concurrent per-memory requests instead
+CATEGORIZATION_BATCHED = os.getenv("CATEGORIZATION_BATCHED", "true").lower() != "false"
+
+# sha256(content) -> categories, so re-ingested or repeated content skips
+# the LLM call
+_categories_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30 * 86400)
+_categories_cache_lock = threading.Lock()
+
+
+def _content_key(memory: str) -> str:
+    return hashlib.sha256(memory.encode()).hexdigest()
+
+
+_CATEGORIES_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "memory_categories",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "categories": {
+                    "type": "array",
+                    "items": {
+                        "type": "string"
+                    }
+                }
+            },
+            "required": ["categories"],
+            "additionalProperties": False
+        }
+    }
+}
+
 
 class MemoryCategories(BaseModel):
     categories: List[str]
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=15))
 def get_categories_for_memory(memory: str) -> List[str]:
+    key = _content_key(memory)
+    with _categories_cache_lock:
+        cached = _categories_cache.get(key)
+    if cached is not None:
+        return list(cached)
     try:
         messages = [
             {"role": "system", "content": MEMORY_CATEGORIZATION_PROMPT},
@@ -24,6 +69,39 @@ def get_categories_for_memory(memory: str) -> List[str]:
         ]
 
         # Use the correct OpenAI response format
+        completion = openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=0,
+            response_format=_CATEGORIES_RESPONSE_FORMAT
+        )
+
+        # Parse the JSON response
+        response_content = completion.choices[0].message.content
+        parsed_data = json.loads(response_content)
+        categories = [cat.strip().lower() for cat in parsed_data.get("categories", [])]
+        with _categories_cache_lock:
+            _categories_cache[key] = tuple(categories)
+        return categories
+
+    except Exception as e:
+        logging.error("[ERROR] Failed to get categories: %s", e)
+        try:
+            logging.debug("[DEBUG] Raw response: %s", completion.choices[0].message.content)
+        except Exception as debug_e:
+            logging.debug("[DEBUG] Could not extract raw response: %s", debug_e)
+        raise
+
+
+def _categorize_batch(memories: List[str]) -> List[Optional[List[str]]]:
+    try:
+        messages = [
+            {"role": "system", "content": MEMORY_BATCH_CATEGORIZATION_PROMPT},
+            {"role": "user", "content": json.dumps(
+                [{"idx": idx, "memory": memory} for idx, memory in enumerate(memories)]
+            )}
+        ]
+
         completion = openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
@@ -31,35 +109,123 @@ def get_categories_for_memory(memory: str) -> List[str]:
             response_format={
                 "type": "json_schema",
                 "json_schema": {
-                    "name": "memory_categories",
+                    "name": "memory_categories_batch",
                     "strict": True,
                     "schema": {
                         "type": "object",
                         "properties": {
-                            "categories": {
+                            "results": {
                                 "type": "array",
                                 "items": {
-                                    "type": "string"
+                                    "type": "object",
+                                    "properties": {
+                                        "idx": {"type": "integer"},
+                                        "categories": {
+                                            "type": "array",
+                                            "items": {"type": "string"}
+                                        }
+                                    },
+                                    "required": ["idx", "categories"],
+                                    "additionalProperties": False
                                 }
                             }
                         },
-                        "required": ["categories"],
+                        "required": ["results"],
                         "additionalProperties": False
                     }
                 }
             }
         )
 
-        # Parse the JSON response
-        import json
-        response_content = completion.choices[0].message.content
-        parsed_data = json.loads(response_content)
-        return [cat.strip().lower() for cat in parsed_data.get("categories", [])]
+        parsed_data = json.loads(completion.choices[0].message.content)
+        results: List[Optional[List[str]]] = [None for _ in memories]
+        for item in parsed_data.get("results", []):
+            idx = item.get("idx")
+            if isinstance(idx, int) and 0 <= idx < len(memories):
+                results[idx] = [cat.strip().lower() for cat in item.get("categories", [])]
+        return results
 
     except Exception as e:
-        logging.error(f"[ERROR] Failed to get categories: {e}")
-        try:
-            logging.debug(f"[DEBUG] Raw response: {completion.choices[0].message.content}")
-        except Exception as debug_e:
-            logging.debug(f"[DEBUG] Could not extract raw response: {debug_e}")
+        logging.error("[ERROR] Failed to get categories for batch: %s", e)
         raise
+
+
+async def _get_categories_for_memory_async(client: AsyncOpenAI, memory: str) -> List[str]:
+    completion = await client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": MEMORY_CATEGORIZATION_PROMPT},
+            {"role": "user", "content": memory}
+        ],
+        temperature=0,
+        response_format=_CATEGORIES_RESPONSE_FORMAT
+    )
+    parsed_data = json.loads(completion.choices[0].message.content)
+    return [cat.strip().lower() for cat in parsed_data.get("categories", [])]
+
+
+async def _gather_categories(memories: List[str]) -> List[Optional[List[str]]]:
+    # A fresh client per run: its connection pool is tied to this event loop
+    async with AsyncOpenAI() as client:
+        results = await asyncio.gather(
+            *(_get_categories_for_memory_async(client, memory) for memory in memories),
+            return_exceptions=True
+        )
+    categories: List[Optional[List[str]]] = []
+    for result in results:
+        if isinstance(result, BaseException):
+            logging.error("[ERROR] Failed to get categories: %s", result)
+            categories.append(None)
+        else:
+            categories.append(result)
+    return categories
+
+
+def get_categories_concurrently(memories: List[str]) -> List[Optional[List[str]]]:
+    """Categorize memories with one concurrent request each.
+
+    Memories whose request failed come back as None.
+
+    Used when batched prompts are disabled (CATEGORIZATION_BATCHED=false)
+    or a batched request fails. Must be called from a thread without a
+    running event loop, such as the categorization worker pool.
+    """
+    return asyncio.run(_gather_categories(memories))
+
+
+def get_categories_for_memories(memories: List[str]) -> List[List[str]]:
+    """Categorize many memories, one request per CATEGORIZATION_BATCH_SIZE items.
+
+    Returns one category list per input, in input order. Raises if any
+    memory could not be categorized; results that did come back are cached
+    first, so a retry by the caller only re-requests the failed ones.
+    """
+    keys = [_content_key(memory) for memory in memories]
+    with _categories_cache_lock:
+        cached = {key: _categories_cache[key] for key in keys if key in _categories_cache}
+    # Only distinct, uncached contents go to the LLM
+    pending = list({key: memory for key, memory in zip(keys, memories) if key not in cached}.items())
+
+    if len(pending) == 1:
+        fresh = [get_categories_for_memory(pending[0][1])]
+    elif not CATEGORIZATION_BATCHED:
+        fresh = get_categories_concurrently([memory for _, memory in pending])
+    else:
+        fresh = []
+        for start in range(0, len(pending), CATEGORIZATION_BATCH_SIZE):
+            chunk = [memory for _, memory in pending[start:start + CATEGORIZATION_BATCH_SIZE]]
+            try:
+                fresh.extend(_categorize_batch(chunk))
+            except Exception:
+                fresh.extend(get_categories_concurrently(chunk))
+
+    with _categories_cache_lock:
+        for (key, _), categories in zip(pending, fresh):
+            # Failed or missing results are not cached so they get retried
+            if categories is not None:
+                cached[key] = tuple(categories)
+                _categories_cache[key] = tuple(categories)
+    failed = sum(categories is None for categories in fresh)
+    if failed:
+        raise RuntimeError(f"Failed to categorize {failed} of {len(pending)} memories")
+    return [list(cached[key]) for key in keys]
@@ -1,6 +1,16 @@
+import datetime
+import logging
+import uuid
+import orjson
+from cachetools import TTLCache
+from sqlalchemy import Connection, event, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models import User, App
-from typing import Tuple
+from app.models import User, App, Memory, MemoryState, get_current_utc_time, queue_categorization, uuid7
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 def get_or_create_user(db: Session, user_id: str) -> User:
@@ -30,3 +40,257 @@ def get_user_and_app(db: Session, user_id: str, app_id: str) -> Tuple[User, App]
     user = get_or_create_user(db, user_id)
     app = get_or_create_app(db, user, app_id)
     return user, app
+
+
+async def get_or_create_user_async(db: AsyncSession, user_id: str) -> User:
+    """Async variant of get_or_create_user"""
+    user = (await db.execute(select(User).where(User.user_id == user_id))).scalars().first()
+    if not user:
+        user = User(user_id=user_id)
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+    return user
+
+
+async def get_or_create_app_async(db: AsyncSession, user: User, app_id: str) -> App:
+    """Async variant of get_or_create_app"""
+    app = (
+        await db.execute(select(App).where(App.owner_id == user.id, App.name == app_id))
+    ).scalars().first()
+    if not app:
+        app = App(owner_id=user.id, name=app_id)
+        db.add(app)
+        await db.commit()
+        await db.refresh(app)
+    return app
+
+
+async def get_user_and_app_async(db: AsyncSession, user_id: str, app_id: str) -> Tuple[User, App]:
+    """Async variant of get_user_and_app"""
+    user = await get_or_create_user_async(db, user_id)
+    app = await get_or_create_app_async(db, user, app_id)
+    return user, app
+
+
+class UserRef(NamedTuple):
+    id: uuid.UUID
+
+
+class AppRef(NamedTuple):
+    id: uuid.UUID
+    name: str
+    is_active: bool
+
+
+# (user_id, app name) -> (UserRef, AppRef). Short TTL so a pause made
+# through another worker is picked up quickly; this process clears it when
+# a commit changes or deletes a User or App (see _note_user_app_changes).
+# Bulk UPDATE/DELETE statements bypass that hook and stay cached for up to
+# the TTL.
+_user_app_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+# Get-or-create user and app in one round-trip. DO NOTHING (rather than a
+# no-op DO UPDATE) keeps existing rows untouched, so updated_at triggers
+# don't fire; rows that already existed are picked up by the UNION ALL
+# branches.
+_UPSERT_USER_AND_APP = text("""
+    WITH new_user AS (
+        INSERT INTO users (id, user_id, metadata, created_at, updated_at)
+        VALUES (:user_pk, :user_id, '{}', now(), now())
+        ON CONFLICT (user_id) DO NOTHING
+        RETURNING id
+    ), owner AS (
+        SELECT id FROM new_user
+        UNION ALL
+        SELECT id FROM users WHERE user_id = :user_id
+        LIMIT 1
+    ), new_app AS (
+        INSERT INTO apps (id, owner_id, name, metadata, is_active, created_at, updated_at)
+        SELECT :app_pk, owner.id, :app_name, '{}', true, now(), now() FROM owner
+        ON CONFLICT (owner_id, name) DO NOTHING
+        RETURNING owner_id, id, is_active
+    )
+    SELECT owner_id, id, is_active FROM new_app
+    UNION ALL
+    SELECT apps.owner_id, apps.id, apps.is_active
+    FROM apps JOIN owner ON apps.owner_id = owner.id
+    WHERE apps.name = :app_name
+    LIMIT 1
+""")
+
+
+async def resolve_user_and_app_async(db: AsyncSession, user_id: str, app_id: str) -> Tuple[UserRef, AppRef]:
+    """Get or create a user and their app, returning lightweight id/state refs.
+
+    Results are cached per (user_id, app name). On Postgres a miss costs a
+    single upsert statement; other databases fall back to the ORM helpers.
+    """
+    key = (user_id, app_id)
+    cached = _user_app_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if db.get_bind().dialect.name == "postgresql":
+        params = {"user_pk": uuid7(), "user_id": user_id, "app_pk": uuid7(), "app_name": app_id}
+        row = (await db.execute(_UPSERT_USER_AND_APP, params)).first()
+        if row is None:
+            # Lost a race with a concurrent insert that committed after our
+            # snapshot was taken; the row is visible to a fresh statement.
+            row = (await db.execute(_UPSERT_USER_AND_APP, params)).first()
+        await db.commit()
+        refs = (UserRef(row.owner_id), AppRef(row.id, app_id, row.is_active))
+    else:
+        user, app = await get_user_and_app_async(db, user_id=user_id, app_id=app_id)
+        refs = (UserRef(user.id), AppRef(app.id, app.name, app.is_active))
+
+    _user_app_cache[key] = refs
+    return refs
+
+
+def invalidate_user_app_cache() -> None:
+    """Forget cached user/app refs."""
+    _user_app_cache.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_user_app_changes(session, flush_context):
+    # New rows can't be cached yet, so only updates and deletes matter
+    if any(isinstance(obj, (User, App)) for obj in session.deleted) or any(
+        isinstance(obj, (User, App)) and session.is_modified(obj) for obj in session.dirty
+    ):
+        session.info["user_app_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_user_app_cache_after_commit(session):
+    if session.info.pop("user_app_changed", False):
+        invalidate_user_app_cache()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_app_changes(session):
+    session.info.pop("user_app_changed", None)
+
+
+def _insert_memories(dialect: str):
+    if dialect == "postgresql":
+        return postgresql.insert(Memory).on_conflict_do_nothing(index_elements=["id"])
+    if dialect == "sqlite":
+        return sqlite.insert(Memory).on_conflict_do_nothing(index_elements=["id"])
+    return insert(Memory)
+
+
+def bulk_insert_memories(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Insert many memory rows in one statement, skipping ids that already exist.
+
+    Uses a Core INSERT ... ON CONFLICT DO NOTHING, so rows bypass the ORM
+    unit of work (and its per-object hooks) and are sent as multi-row VALUES
+    batches. Databases without ON CONFLICT get a plain INSERT, where a
+    duplicate id fails the statement. Every row needs its ``id``; the rows
+    are queued for one categorization batch after the caller commits.
+    """
+    if not rows:
+        return
+    db.execute(_insert_memories(db.get_bind().dialect.name), rows)
+    queue_categorization(db, [row["id"] for row in rows])
+
+
+async def bulk_insert_memories_async(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Async variant of bulk_insert_memories"""
+    if not rows:
+        return
+    await db.execute(_insert_memories(db.get_bind().dialect.name), rows)
+    queue_categorization(db.sync_session, [row["id"] for row in rows])
+
+
+_COPY_MEMORIES = (
+    "COPY memories (id, user_id, app_id, content, metadata, state, created_at, updated_at) "
+    "FROM STDIN"
+)
+
+
+def copy_memories(db: Session, rows: List[Dict[str, Any]]) -> List[uuid.UUID]:
+    """Bulk-import memories with COPY and categorize them once committed.
+
+    Each row needs ``user_id``, ``app_id`` and ``content``; ``id``,
+    ``metadata_`` and ``created_at`` are optional. Rows are streamed over
+    the session's own connection, so they land in the caller's
+    transaction, and the new ids are queued for a single categorization
+    batch that runs after the caller commits. Unlike bulk_insert_memories,
+    a duplicate id fails the whole COPY. Other databases and drivers fall
+    back to bulk_insert_memories.
+    """
+    if not rows:
+        return []
+    now = get_current_utc_time()
+    records = [
+        {
+            "id": row.get("id") or uuid7(),
+            "user_id": row["user_id"],
+            "app_id": row["app_id"],
+            "content": row["content"],
+            "metadata_": row.get("metadata_") or {},
+            "state": MemoryState.active,
+            "created_at": row.get("created_at") or now,
+            "updated_at": now,
+        }
+        for row in rows
+    ]
+
+    # COPY goes through psycopg 3's cursor.copy()
+    if db.get_bind().dialect.driver != "psycopg":
+        bulk_insert_memories(db, records)
+        return [record["id"] for record in records]
+
+    cursor = db.connection().connection.driver_connection.cursor()
+    with cursor, cursor.copy(_COPY_MEMORIES) as copy:
+        for record in records:
+            copy.write_row((
+                record["id"], record["user_id"], record["app_id"], record["content"],
+                orjson.dumps(record["metadata_"]).decode(), record["state"].value,
+                record["created_at"], record["updated_at"],
+            ))
+    ids = [record["id"] for record in records]
+    queue_categorization(db, ids)
+    return ids
+
+
+def ensure_access_log_partitions(conn: Connection, months_ahead: int = 2) -> List[str]:
+    """Create monthly memory_access_logs partitions from this month onwards.
+
+    Returns the names of partitions that were created. Postgres refuses to
+    add a partition for a month that already has rows in the default
+    partition, so those rows are moved into a new table that is then
+    attached in its place. The default partition is locked for the rest of
+    the transaction while that happens.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+    today = datetime.date.today()
+    year, month = today.year, today.month
+    created = []
+    for _ in range(months_ahead + 1):
+        start = datetime.date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        end = datetime.date(year, month, 1)
+        name = f"memory_access_logs_y{start:%Y}m{start:%m}"
+        if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+            continue
+        bounds = f"FROM ('{start}') TO ('{end}')"
+        in_range = f"accessed_at >= '{start}' AND accessed_at < '{end}'"
+        # Keep rows for this month from landing in the default partition
+        # between the check and the attach
+        conn.execute(text("LOCK TABLE memory_access_logs_default IN EXCLUSIVE MODE"))
+        if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM memory_access_logs_default WHERE {in_range})")).scalar():
+            conn.execute(text(f"CREATE TABLE {name} (LIKE memory_access_logs INCLUDING DEFAULTS)"))
+            moved = conn.execute(text(
+                f"WITH moved AS (DELETE FROM memory_access_logs_default WHERE {in_range} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            )).rowcount
+            conn.execute(text(f"ALTER TABLE memory_access_logs ATTACH PARTITION {name} FOR VALUES {bounds}"))
+            logger.warning("Moved %d access log rows from the default partition into %s", moved, name)
+        else:
+            conn.execute(text(f"CREATE TABLE {name} PARTITION OF memory_access_logs FOR VALUES {bounds}"))
+        created.append(name)
+    return created
@@ -5,15 +5,18 @@ This module provides functionality to initialize and manage the Mem0 memory clie
 with automatic configuration management, Docker environment support, and Qdrant index management.
 """
 
+import asyncio
 import os
-import json
-import hashlib
 import socket
 import platform
+import re
+import time
 import logging
+from functools import lru_cache
+from types import MappingProxyType
 
-from mem0 import Memory
-from app.database import SessionLocal
+from sqlalchemy import select
+from app.database import AsyncSessionLocal, SessionLocal
 from app.models import Config as ConfigModel
 
 logger = logging.getLogger(__name__)
@@ -21,32 +24,114 @@ logger = logging.getLogger(__name__)
 _memory_client = None
 _config_hash = None
 _qdrant_client = None
+_async_qdrant_client = None
 _indexes_created = False
+# (configs.updated_at, custom_instructions) the current client was built
+# from; while it and the environment are unchanged get_memory_client returns
+# early
+_client_fingerprint = None
+# Generated by _compile_env_check after each build; None until a client exists
+_env_unchanged = None
+# When the current client was built without its vector store because Qdrant
+# was unreachable (time.monotonic()); None otherwise. Such a client skips
+# the fast path once QDRANT_PROBE_TTL has passed, so Qdrant is probed again.
+_degraded_since = None
+
+# Environment variables that feed into the memory client configuration
+_CONFIG_ENV_KEYS = (
+    "OPENAI_API_KEY",
+    "QDRANT_URL",
+    "QDRANT_API_KEY",
+    "QDRANT_COLLECTION_NAME",
+    "OLLAMA_HOST",
+)
+
+
+def _env_fingerprint():
+    return tuple(os.environ.get(key) for key in _CONFIG_ENV_KEYS)
+
+
+def _qdrant_reprobe_due():
+    return _degraded_since is not None and time.monotonic() - _degraded_since >= QDRANT_PROBE_TTL
+
+
+def _compile_env_check(snapshot):
+    """Generate a check that the config env vars still hold the snapshot values.
+
+    The values are baked into the function as constants, so the check is a
+    short chain of environ lookups and comparisons with no tuple building.
+    """
+    terms = " and ".join(
+        f"_get({key!r}) == {value!r}" for key, value in zip(_CONFIG_ENV_KEYS, snapshot)
+    )
+    namespace = {"_get": os.environ.get}
+    exec(f"def _env_unchanged():\n    return {terms}\n", namespace)
+    return namespace["_env_unchanged"]
+
+
+def _get_config_updated_at():
+    """Return configs.updated_at for the main config row (None if absent)."""
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(ConfigModel.updated_at).where(ConfigModel.key == "main")
+        ).scalar()
+    finally:
+        db.close()
+
+
+def _canonicalize(value):
+    """Turn nested dicts/lists into hashable tuples with a stable key order."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _canonicalize(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonicalize(item) for item in value)
+    return value
 
 
 def _get_config_hash(config_dict):
-    """Generate a hash of the config to detect changes."""
-    config_str = json.dumps(config_dict, sort_keys=True)
-    return hashlib.md5(config_str.encode()).hexdigest()
+    """Generate a hash of the config to detect changes (stable within a process)."""
+    return hash(_canonicalize(config_dict))
 
 
+def _read_default_gateway():
+    """Return the IPv4 default gateway from /proc/net/route, or None."""
+    try:
+        with open('/proc/net/route', 'r') as f:
+            next(f, None)  # header
+            for line in f:
+                fields = line.split()
+                if fields[1] == '00000000':  # Default route
+                    return socket.inet_ntoa(bytes.fromhex(fields[2])[::-1])
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+# None of these can change while the process runs
+_IN_DOCKER = os.path.exists('/.dockerenv')
+_DEFAULT_GATEWAY = _read_default_gateway() if _IN_DOCKER else None
+
+
+@lru_cache(maxsize=1)
 def _get_docker_host_url():
     """
     Determine the appropriate host URL to reach host machine from inside Docker container.
     Returns the best available option for reaching the host from inside a container.
+    Resolved once per process.
     """
     # Check for custom environment variable first
     custom_host = os.environ.get('OLLAMA_HOST')
     if custom_host:
-        print(f"Using custom Ollama host from OLLAMA_HOST: {custom_host}")
+        logger.info("Using custom Ollama host from OLLAMA_HOST: %s", custom_host)
         return custom_host.replace('http://', '').replace('https://', '').split(':')[0]
     
     # Check if we're running inside Docker
-    if not os.path.exists('/.dockerenv'):
+    if not _IN_DOCKER:
         # Not in Docker, return localhost as-is
         return "localhost"
     
-    print("Detected Docker environment, adjusting host URL for Ollama...")
+    logger.info("Detected Docker environment, adjusting host URL for Ollama...")
     
     # Try different host resolution strategies
     host_candidates = []
@@ -55,33 +140,27 @@ def _get_docker_host_url():
     try:
         socket.gethostbyname('host.docker.internal')
         host_candidates.append('host.docker.internal')
-        print("Found host.docker.internal")
+        logger.info("Found host.docker.internal")
     except socket.gaierror:
         pass
     
     # 2. Docker bridge gateway (typically 172.17.0.1 on Linux)
-    try:
-        with open('/proc/net/route', 'r') as f:
-            for line in f:
-                fields = line.strip().split()
-                if fields[1] == '00000000':  # Default route
-                    gateway_hex = fields[2]
-                    gateway_ip = socket.inet_ntoa(bytes.fromhex(gateway_hex)[::-1])
-                    host_candidates.append(gateway_ip)
-                    print(f"Found Docker gateway: {gateway_ip}")
-                    break
-    except (FileNotFoundError, IndexError, ValueError):
-        pass
+    if _DEFAULT_GATEWAY:
+        host_candidates.append(_DEFAULT_GATEWAY)
+        logger.info("Found Docker gateway: %s", _DEFAULT_GATEWAY)
     
     # 3. Fallback to common Docker bridge IP
     if not host_candidates:
         host_candidates.append('172.17.0.1')
-        print("Using fallback Docker bridge IP: 172.17.0.1")
+        logger.info("Using fallback Docker bridge IP: 172.17.0.1")
     
     # Return the first available candidate
     return host_candidates[0]
 
 
+_LOCAL_HOST_RE = re.compile(r'localhost|127\.0\.0\.1')
+
+
 def _fix_ollama_urls(config_section):
     """
     Fix Ollama URLs for Docker environment.
@@ -99,12 +178,12 @@ def _fix_ollama_urls(config_section):
     else:
         # Check for ollama_base_url and fix if it's localhost
         url = ollama_config["ollama_base_url"]
-        if "localhost" in url or "127.0.0.1" in url:
+        if _LOCAL_HOST_RE.search(url):
             docker_host = _get_docker_host_url()
             if docker_host != "localhost":
-                new_url = url.replace("localhost", docker_host).replace("127.0.0.1", docker_host)
+                new_url = _LOCAL_HOST_RE.sub(docker_host, url)
                 ollama_config["ollama_base_url"] = new_url
-                print(f"Adjusted Ollama URL from {url} to {new_url}")
+                logger.info("Adjusted Ollama URL from %s to %s", url, new_url)
     
     return config_section
 
@@ -115,13 +194,20 @@ def _get_qdrant_config():
     Supports both local Qdrant and Qdrant Cloud.
     Only includes fields allowed by Mem0's MemoryConfig.
     """
-    qdrant_url = os.environ.get('QDRANT_URL', '')
-    qdrant_api_key = os.environ.get('QDRANT_API_KEY', '')
-    qdrant_collection = os.environ.get('QDRANT_COLLECTION_NAME', 'openmemory')
-    
+    config = _qdrant_config_for(
+        os.environ.get('QDRANT_URL', ''),
+        os.environ.get('QDRANT_API_KEY', ''),
+        os.environ.get('QDRANT_COLLECTION_NAME', 'openmemory'),
+    )
+    return dict(config) if config is not None else None
+
+
+@lru_cache(maxsize=1)
+def _qdrant_config_for(qdrant_url, qdrant_api_key, qdrant_collection):
+    """Build the Qdrant config for one set of environment values."""
     # Check if Qdrant is disabled
     if qdrant_url.lower() in ['disabled', 'false', 'off']:
-        print("⚠️ Qdrant disabled via environment variable")
+        logger.info("⚠️ Qdrant disabled via environment variable")
         return None
     
     # Qdrant Cloud configuration
@@ -137,12 +223,12 @@ def _get_qdrant_config():
             "collection_name": qdrant_collection,
         }
         
-        print(f"🔗 Configured Qdrant Cloud: {qdrant_url}")
+        logger.info("🔗 Configured Qdrant Cloud: %s", qdrant_url)
         return config
     
     # Local Qdrant configuration (fallback)
     elif qdrant_url:
-        print(f"🔗 Configured local Qdrant: {qdrant_url}")
+        logger.info("🔗 Configured local Qdrant: %s", qdrant_url)
         if qdrant_url.startswith(('http://', 'https://')):
             # Use URL format for local with protocol
             return {
@@ -166,7 +252,7 @@ def _get_qdrant_config():
     
     # Default local configuration
     else:
-        print("🔗 Using default local Qdrant configuration")
+        logger.info("🔗 Using default local Qdrant configuration")
         return {
             "host": "mem0_store",
             "port": 6333,
@@ -174,14 +260,14 @@ def _get_qdrant_config():
         }
 
 
-def _setup_qdrant_client():
+def _setup_qdrant_client(qdrant_config=None):
     """Setup direct Qdrant client for index management"""
     global _qdrant_client
     
     try:
         from qdrant_client import QdrantClient
         
-        config = _get_qdrant_config()
+        config = qdrant_config or _get_qdrant_config()
         if not config:
             return False
         
@@ -202,12 +288,40 @@ def _setup_qdrant_client():
         return True
         
     except Exception as e:
-        logger.error(f"❌ Failed to setup Qdrant client: {e}")
+        logger.error("❌ Failed to setup Qdrant client: %s", e)
         _qdrant_client = None
         return False
 
 
-def _ensure_qdrant_indexes():
+def get_async_qdrant_client():
+    """Get a cached AsyncQdrantClient for direct queries from async handlers.
+
+    Returns None if Qdrant is not configured.
+    """
+    global _async_qdrant_client
+
+    if _async_qdrant_client is None:
+        from qdrant_client import AsyncQdrantClient
+
+        config = _get_qdrant_config()
+        if not config:
+            return None
+
+        if "url" in config:
+            _async_qdrant_client = AsyncQdrantClient(url=config["url"], api_key=config.get("api_key"))
+        else:
+            _async_qdrant_client = AsyncQdrantClient(
+                host=config.get("host", "localhost"),
+                port=config.get("port", 6333)
+            )
+    return _async_qdrant_client
+
+
+# Payload fields filtered on in searches
+_PAYLOAD_INDEX_FIELDS = ("user_id", "app_id")
+
+
+def _ensure_qdrant_indexes(qdrant_config=None):
     """Ensure required indexes exist in Qdrant"""
     global _indexes_created, _qdrant_client
     
@@ -215,92 +329,91 @@ def _ensure_qdrant_indexes():
         return
     
     try:
+        from qdrant_client.http.exceptions import UnexpectedResponse
         from qdrant_client.models import PayloadSchemaType
         
-        config = _get_qdrant_config()
+        config = qdrant_config or _get_qdrant_config()
         collection_name = config.get("collection_name", "openmemory")
         
-        # Check if collection exists
+        # One GET tells both whether the collection exists and which
+        # payload indexes it already has
         try:
-            collections = _qdrant_client.get_collections()
-            collection_exists = any(col.name == collection_name for col in collections.collections)
-            
-            if not collection_exists:
-                logger.info(f"Collection '{collection_name}' doesn't exist yet - indexes will be created when first memory is added")
-                return
-            
-        except Exception as e:
-            logger.warning(f"Could not check collections: {e}")
+            collection = _qdrant_client.get_collection(collection_name)
+        except UnexpectedResponse as e:
+            if e.status_code == 404:
+                logger.info("Collection '%s' doesn't exist yet - indexes will be created when first memory is added", collection_name)
+            else:
+                logger.warning("Could not check collection: %s", e)
             return
-        
-        # Create index for user_id field
-        try:
-            _qdrant_client.create_payload_index(
-                collection_name=collection_name,
-                field_name="user_id",
-                field_schema=PayloadSchemaType.KEYWORD
-            )
-            logger.info("✅ Created index for user_id field")
-            
         except Exception as e:
-            if "already exists" in str(e).lower():
-                logger.info("ℹ️ Index for user_id already exists")
-            else:
-                logger.warning(f"⚠️ Could not create user_id index: {e}")
+            logger.warning("Could not check collection: %s", e)
+            return
         
-        # Create index for app_id field (if used)
-        try:
-            _qdrant_client.create_payload_index(
-                collection_name=collection_name,
-                field_name="app_id", 
-                field_schema=PayloadSchemaType.KEYWORD
-            )
-            logger.info("✅ Created index for app_id field")
-            
-        except Exception as e:
-            if "already exists" in str(e).lower():
-                logger.info("ℹ️ Index for app_id already exists")
-            else:
-                logger.warning(f"⚠️ Could not create app_id index: {e}")
+        existing = set(collection.payload_schema or ())
+        for field_name in _PAYLOAD_INDEX_FIELDS:
+            if field_name in existing:
+                continue
+            try:
+                # wait=False: Qdrant builds the index in the background, so
+                # the requests don't each wait for completion
+                _qdrant_client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=PayloadSchemaType.KEYWORD,
+                    wait=False
+                )
+                logger.info("✅ Created index for %s field", field_name)
+                
+            except UnexpectedResponse as e:
+                if e.status_code == 409:
+                    logger.info("ℹ️ Index for %s already exists", field_name)
+                else:
+                    logger.warning("⚠️ Could not create %s index: %s", field_name, e)
+            except Exception as e:
+                logger.warning("⚠️ Could not create %s index: %s", field_name, e)
         
         _indexes_created = True
         
     except Exception as e:
-        logger.error(f"❌ Failed to ensure indexes: {e}")
+        logger.error("❌ Failed to ensure indexes: %s", e)
 
 
 def reset_memory_client():
     """Reset the global memory client to force reinitialization with new config."""
-    global _memory_client, _config_hash, _qdrant_client, _indexes_created
+    global _memory_client, _config_hash, _qdrant_client, _async_qdrant_client, _indexes_created
+    global _client_fingerprint, _env_unchanged, _degraded_since
     _memory_client = None
     _config_hash = None
+    _client_fingerprint = None
+    _env_unchanged = None
+    _degraded_since = None
     _qdrant_client = None
+    _async_qdrant_client = None
     _indexes_created = False
 
 
-def get_default_memory_config():
+# Defaults shared by every call to get_default_memory_config; never mutated
+_DEFAULT_LLM_CONFIG = MappingProxyType({
+    "model": "gpt-4o-mini",
+    "temperature": 0.1,
+    "max_tokens": 2000,
+    "api_key": "env:OPENAI_API_KEY"
+})
+_DEFAULT_EMBEDDER_CONFIG = MappingProxyType({
+    "model": "text-embedding-3-small",
+    "api_key": "env:OPENAI_API_KEY"
+})
+
+
+def get_default_memory_config(qdrant_config=None):
     """Get default memory client configuration with sensible defaults."""
     
     # Get Qdrant configuration
-    qdrant_config = _get_qdrant_config()
+    qdrant_config = qdrant_config or _get_qdrant_config()
     
     base_config = {
-        "llm": {
-            "provider": "openai",
-            "config": {
-                "model": "gpt-4o-mini",
-                "temperature": 0.1,
-                "max_tokens": 2000,
-                "api_key": "env:OPENAI_API_KEY"
-            }
-        },
-        "embedder": {
-            "provider": "openai",
-            "config": {
-                "model": "text-embedding-3-small",
-                "api_key": "env:OPENAI_API_KEY"
-            }
-        },
+        "llm": {"provider": "openai", "config": dict(_DEFAULT_LLM_CONFIG)},
+        "embedder": {"provider": "openai", "config": dict(_DEFAULT_EMBEDDER_CONFIG)},
         "version": "v1.1"
     }
     
@@ -310,82 +423,118 @@ def get_default_memory_config():
             "provider": "qdrant",
             "config": qdrant_config
         }
-        print("✅ Vector store (Qdrant) included in configuration")
+        logger.debug("✅ Vector store (Qdrant) included in configuration")
     else:
-        print("⚠️ No vector store configured - running in basic mode")
+        logger.debug("⚠️ No vector store configured - running in basic mode")
     
     return base_config
 
 
+# "env:VARIABLE_NAME" references in config values
+_ENV_REF = re.compile(r'^env:(.+)$')
+
+
 def _parse_environment_variables(config_dict):
     """
     Parse environment variables in config values.
     Converts 'env:VARIABLE_NAME' to actual environment variable values.
+    Returns a copy; nested dicts are walked iteratively.
     """
-    if isinstance(config_dict, dict):
-        parsed_config = {}
-        for key, value in config_dict.items():
-            if isinstance(value, str) and value.startswith("env:"):
-                env_var = value.split(":", 1)[1]
-                env_value = os.environ.get(env_var)
-                if env_value:
-                    parsed_config[key] = env_value
-                    print(f"Loaded {env_var} from environment for {key}")
-                else:
-                    print(f"Warning: Environment variable {env_var} not found, keeping original value")
-                    parsed_config[key] = value
-            elif isinstance(value, dict):
-                parsed_config[key] = _parse_environment_variables(value)
-            else:
-                parsed_config[key] = value
-        return parsed_config
-    return config_dict
+    if not isinstance(config_dict, dict):
+        return config_dict
+    environ = os.environ
+    parsed_config = dict(config_dict)
+    stack = [parsed_config]
+    while stack:
+        node = stack.pop()
+        for key, value in node.items():
+            if isinstance(value, dict):
+                node[key] = value = dict(value)
+                stack.append(value)
+            elif isinstance(value, str):
+                match = _ENV_REF.match(value)
+                if match:
+                    env_var = match.group(1)
+                    env_value = environ.get(env_var)
+                    if env_value:
+                        node[key] = env_value
+                        logger.debug("Loaded %s from environment for %s", env_var, key)
+                    else:
+                        logger.warning("Environment variable %s not found, keeping original value", env_var)
+    return parsed_config
+
+
+# Seconds a Qdrant probe result is reused before probing again
+QDRANT_PROBE_TTL = 60
+_qdrant_session = None
+_last_probe = None  # (monotonic time, probe key, ok)
+
+
+def _get_qdrant_session():
+    """Keep-alive HTTP session for Qdrant probes (created on first use)."""
+    global _qdrant_session
+    if _qdrant_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        _qdrant_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        _qdrant_session.mount("http://", adapter)
+        _qdrant_session.mount("https://", adapter)
+    return _qdrant_session
+
 
+def _test_qdrant_connection(qdrant_config=None):
+    """Test Qdrant connection to verify it's working.
 
-def _test_qdrant_connection():
-    """Test Qdrant connection to verify it's working."""
-    qdrant_config = _get_qdrant_config()
+    The result is reused for QDRANT_PROBE_TTL seconds per Qdrant endpoint.
+    """
+    global _last_probe
+    qdrant_config = qdrant_config or _get_qdrant_config()
     
     if not qdrant_config:
         return False
     
+    # Build URL based on config format
+    if "url" in qdrant_config:
+        # URL-based config (Qdrant Cloud)
+        base_url = qdrant_config["url"]
+        if not base_url.endswith('/'):
+            base_url += '/'
+        test_url = f"{base_url}collections"
+    else:
+        # Host/port-based config (local)
+        host = qdrant_config.get("host", "localhost")
+        port = qdrant_config.get("port", 6333)
+        test_url = f"http://{host}:{port}/collections"
+    
+    api_key = qdrant_config.get("api_key")
+    probe_key = (test_url, api_key)
+    now = time.monotonic()
+    if _last_probe is not None and _last_probe[1] == probe_key and now - _last_probe[0] < QDRANT_PROBE_TTL:
+        return _last_probe[2]
+
+    ok = False
     try:
-        import requests
-        
-        # Build URL based on config format
-        if "url" in qdrant_config:
-            # URL-based config (Qdrant Cloud)
-            base_url = qdrant_config["url"]
-            if not base_url.endswith('/'):
-                base_url += '/'
-            test_url = f"{base_url}collections"
-        else:
-            # Host/port-based config (local)
-            host = qdrant_config.get("host", "localhost")
-            port = qdrant_config.get("port", 6333)
-            test_url = f"http://{host}:{port}/collections"
-        
-        api_key = qdrant_config.get("api_key")
-        
         headers = {"Content-Type": "application/json"}
         if api_key:
             headers["api-key"] = api_key
         
-        print(f"🔍 Testing Qdrant connection: {test_url}")
+        logger.info("🔍 Testing Qdrant connection: %s", test_url)
         
-        response = requests.get(test_url, headers=headers, timeout=10)
+        response = _get_qdrant_session().get(test_url, headers=headers, timeout=5)
         
         if response.status_code in [200, 404]:  # 404 is OK (no collections yet)
-            print(f"✅ Qdrant connection successful (status: {response.status_code})")
-            return True
+            logger.info("✅ Qdrant connection successful (status: %s)", response.status_code)
+            ok = True
         else:
-            print(f"❌ Qdrant connection failed (status: {response.status_code})")
-            print(f"Response: {response.text}")
-            return False
+            logger.warning("❌ Qdrant connection failed (status: %s): %s", response.status_code, response.text)
             
     except Exception as e:
-        print(f"❌ Qdrant connection test failed: {e}")
-        return False
+        logger.warning("❌ Qdrant connection test failed: %s", e)
+
+    _last_probe = (now, probe_key, ok)
+    return ok
 
 
 def get_memory_client(custom_instructions: str = None):
@@ -401,11 +550,26 @@ def get_memory_client(custom_instructions: str = None):
     Raises:
         Exception: If required API keys are not set or critical configuration is missing.
     """
-    global _memory_client, _config_hash, _qdrant_client
+    global _memory_client, _config_hash, _qdrant_client, _client_fingerprint, _env_unchanged
+    global _degraded_since
+
+    # Fast path: nothing the config is built from has changed since the
+    # current client was created
+    try:
+        fingerprint = (_get_config_updated_at(), custom_instructions)
+    except Exception:
+        fingerprint = None
+    if (_memory_client is not None and fingerprint is not None
+            and fingerprint == _client_fingerprint and _env_unchanged()
+            and not _qdrant_reprobe_due()):
+        return _memory_client
+    env_snapshot = _env_fingerprint()
 
     try:
         # Start with default configuration
-        config = get_default_memory_config()
+        # Resolved once and passed to every helper below
+        qdrant_config = _get_qdrant_config()
+        config = get_default_memory_config(qdrant_config)
         
         # Variable to track custom instructions
         db_custom_instructions = None
@@ -442,13 +606,12 @@ def get_memory_client(custom_instructions: str = None):
                         if config["embedder"].get("provider") == "ollama":
                             config["embedder"] = _fix_ollama_urls(config["embedder"])
             else:
-                print("No configuration found in database, using defaults")
+                logger.debug("No configuration found in database, using defaults")
                     
             db.close()
                             
         except Exception as e:
-            print(f"Warning: Error loading configuration from database: {e}")
-            print("Using default configuration")
+            logger.warning("Error loading configuration from database, using default configuration: %s", e)
             # Continue with default configuration if database config can't be loaded
 
         # Use custom_instructions parameter first, then fall back to database value
@@ -458,53 +621,85 @@ def get_memory_client(custom_instructions: str = None):
 
         # ALWAYS parse environment variables in the final config
         # This ensures that even default config values like "env:OPENAI_API_KEY" get parsed
-        print("Parsing environment variables in final config...")
+        logger.debug("Parsing environment variables in final config...")
         config = _parse_environment_variables(config)
 
         # Test Qdrant connection and setup client if vector store is configured
+        qdrant_unreachable = False
         if "vector_store" in config:
-            if not _test_qdrant_connection():
-                print("⚠️ Qdrant connection failed, removing vector store from config")
+            if not _test_qdrant_connection(qdrant_config):
+                logger.warning("⚠️ Qdrant connection failed, removing vector store from config")
                 config.pop("vector_store", None)
+                qdrant_unreachable = True
             else:
                 # Setup Qdrant client for index management
-                _setup_qdrant_client()
+                _setup_qdrant_client(qdrant_config)
 
         # Check if config has changed by comparing hashes
         current_config_hash = _get_config_hash(config)
         
         # Only reinitialize if config changed or client doesn't exist
         if _memory_client is None or _config_hash != current_config_hash:
-            print(f"Initializing memory client with config hash: {current_config_hash}")
+            logger.info("Initializing memory client with config hash: %s", current_config_hash)
             try:
+                # Imported here: mem0 pulls in the LLM/vector-store client
+                # stack, which processes that never build a client skip
+                from mem0 import Memory
+
                 _memory_client = Memory.from_config(config_dict=config)
                 _config_hash = current_config_hash
                 
                 # Ensure indexes exist if we have Qdrant
                 if "vector_store" in config and _qdrant_client:
-                    _ensure_qdrant_indexes()
+                    _ensure_qdrant_indexes(qdrant_config)
                 
                 # Log the configuration mode
                 if "vector_store" in config:
-                    print("✅ Memory client initialized with vector store (Qdrant)")
+                    logger.info("✅ Memory client initialized with vector store (Qdrant)")
                 else:
-                    print("✅ Memory client initialized in basic mode (no vector store)")
+                    logger.info("✅ Memory client initialized in basic mode (no vector store)")
                     
             except Exception as init_error:
-                print(f"Warning: Failed to initialize memory client: {init_error}")
-                print("Server will continue running with limited memory functionality")
+                logger.warning("Failed to initialize memory client, continuing with limited memory functionality: %s", init_error)
                 _memory_client = None
                 _config_hash = None
                 return None
         
+        _env_unchanged = _compile_env_check(env_snapshot)
+        _client_fingerprint = fingerprint
+        _degraded_since = time.monotonic() if qdrant_unreachable else None
         return _memory_client
         
     except Exception as e:
-        print(f"Warning: Exception occurred while initializing memory client: {e}")
-        print("Server will continue running with limited memory functionality")
+        logger.warning("Exception occurred while initializing memory client, continuing with limited memory functionality: %s", e)
         return None
 
 
+async def _get_config_updated_at_async():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(ConfigModel.updated_at).where(ConfigModel.key == "main")
+        )).scalar()
+
+
+async def get_memory_client_async(custom_instructions: str = None):
+    """
+    Async counterpart of get_memory_client for code running on the event loop.
+
+    The unchanged-config check uses the async engine; building or rebuilding
+    the client (Qdrant probe, mem0 setup) runs in a worker thread.
+    """
+    if (_memory_client is not None and _client_fingerprint is not None and _env_unchanged()
+            and not _qdrant_reprobe_due()):
+        try:
+            fingerprint = (await _get_config_updated_at_async(), custom_instructions)
+        except Exception:
+            fingerprint = None
+        if fingerprint == _client_fingerprint:
+            return _memory_client
+    return await asyncio.to_thread(get_memory_client, custom_instructions)
+
+
 def ensure_indexes_after_add():
     """Ensure indexes exist after adding memories (call this after successful memory add)"""
     global _qdrant_client, _indexes_created
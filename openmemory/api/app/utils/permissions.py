@@ -1,7 +1,8 @@
 from typing import Optional
 from uuid import UUID
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
-from app.models import Memory, App, MemoryState
+from app.models import Memory, App, MemoryState, AccessControl
 
 
 def check_memory_access_permissions(
@@ -50,3 +51,59 @@ def check_memory_access_permissions(
 
     # Check if memory is in the accessible set
     return memory.id in accessible_memory_ids
+
+
+def memory_access_clause(app_id: Optional[UUID] = None):
+    """
+    SQL counterpart of check_memory_access_permissions.
+
+    Returns a boolean expression over Memory that encodes the same rules
+    (active memory, active app, app-level ACL rules from
+    get_accessible_memory_ids) so callers can filter accessible memories in
+    one query instead of checking rows one at a time. When both "allow all"
+    and "deny all" rules exist for an app, deny wins.
+
+    Args:
+        app_id: Optional app ID to check permissions for
+
+    Returns:
+        A SQLAlchemy clause usable in ``.where()`` / ``.filter()``
+    """
+    clause = Memory.state == MemoryState.active
+    if not app_id:
+        return clause
+
+    app_rules = select(AccessControl.id).where(
+        AccessControl.subject_type == "app",
+        AccessControl.subject_id == app_id,
+        AccessControl.object_type == "memory"
+    )
+    allow_all = app_rules.where(AccessControl.effect == "allow", AccessControl.object_id.is_(None)).exists()
+    deny_all = app_rules.where(AccessControl.effect == "deny", AccessControl.object_id.is_(None)).exists()
+    allowed = app_rules.where(AccessControl.effect == "allow", AccessControl.object_id == Memory.id).exists()
+    denied = app_rules.where(AccessControl.effect == "deny", AccessControl.object_id == Memory.id).exists()
+    app_is_active = select(App.id).where(App.id == app_id, App.is_active.is_(True)).exists()
+
+    return and_(
+        clause,
+        app_is_active,
+        or_(
+            ~app_rules.exists(),
+            and_(~deny_all, or_(allow_all, and_(allowed, ~denied)))
+        )
+    )
+
+
+def accessible_memories_query(user_id: UUID, app_id: Optional[UUID] = None):
+    """Select the user's memories that the given app is allowed to access."""
+    return select(Memory).where(Memory.user_id == user_id, memory_access_clause(app_id))
+
+
+def accessible_memory_ids_query(user_id: UUID, app_id: Optional[UUID] = None):
+    """Select only the ids of the user's memories that the given app may access."""
+    return select(Memory.id).where(Memory.user_id == user_id, memory_access_clause(app_id))
+
+
+def inaccessible_memory_ids_query(user_id: UUID, app_id: Optional[UUID] = None):
+    """Select the ids of the user's memories that the given app may NOT access."""
+    return select(Memory.id).where(Memory.user_id == user_id, ~memory_access_clause(app_id))
@@ -26,3 +26,7 @@ Guidelines:
 - If you cannot categorize the memory, return an empty list with key 'categories'.
 - Don't limit yourself to the categories listed above only. Feel free to create new categories based on the memory. Make sure that it is a single phrase.
 """
+
+MEMORY_BATCH_CATEGORIZATION_PROMPT = MEMORY_CATEGORIZATION_PROMPT + """
+You will receive a JSON list of memories, each with an 'idx' and a 'memory'. Categorize every memory independently and return one entry per memory under the 'results' key, each with the memory's 'idx' and its 'categories'.
+"""
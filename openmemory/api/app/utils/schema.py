@@ -0,0 +1,167 @@
+"""
+Ahead-of-time schema DDL.
+
+`python -m app.utils.schema` writes the Postgres DDL for every model
+(including the trigger/partition DDL hooked onto the tables) to schema.sql.
+Run it at build time; at startup create_schema() applies the file in one
+round trip on an empty database instead of letting create_all introspect
+each table.
+"""
+from pathlib import Path
+
+from typing import List, Optional
+
+from sqlalchemy import Connection, bindparam, create_mock_engine, inspect, text
+from sqlalchemy.dialects.postgresql import ARRAY, TEXT
+
+from app.database import Base
+import app.models  # noqa: F401  (registers the models on Base.metadata)
+
+API_ROOT = Path(__file__).resolve().parents[2]
+SCHEMA_SQL_PATH = API_ROOT / "schema.sql"
+
+# The startup.py that predates Alembic-managed startups built the tables
+# with create_all and then stamped the initial migration. Such a database
+# already has what the next two migrations create, so it really sits here.
+INITIAL_REVISION = "0b53c747049a"
+LEGACY_CREATE_ALL_REVISION = "afd00efbd06b"
+
+# Advisory lock key serializing schema setup across replicas that start at
+# the same time
+SCHEMA_LOCK_KEY = 782193471
+
+# Extensions the models depend on: pgvector for Memory.vector, pg_trgm for
+# the trigram index on Memory.content
+REQUIRED_EXTENSIONS = ("vector", "pg_trgm")
+
+_MISSING_TABLES = text(
+    "SELECT name FROM unnest(:names) AS name WHERE to_regclass(name) IS NULL"
+).bindparams(bindparam("names", type_=ARRAY(TEXT)))
+
+
+def generate_schema_sql() -> str:
+    """Render CREATE statements for Base.metadata as a Postgres script.
+
+    The statements are wrapped in a single DO block: both asyncpg and
+    psycopg (with prepare_threshold=0) send queries as prepared statements,
+    which can't hold more than one command.
+    """
+    statements = [f"CREATE EXTENSION IF NOT EXISTS {name};" for name in REQUIRED_EXTENSIONS]
+
+    def executor(sql, *multiparams, **params):
+        statements.append(str(sql.compile(dialect=mock_engine.dialect)).strip() + ";")
+
+    mock_engine = create_mock_engine("postgresql+psycopg://", executor)
+    Base.metadata.create_all(mock_engine, checkfirst=False)
+    body = "\n\n".join(f"EXECUTE {_dollar_quote(stmt)};" for stmt in statements)
+    return f"DO $schema$\nBEGIN\n{body}\nEND\n$schema$;\n"
+
+
+def _dollar_quote(sql: str) -> str:
+    """Quote sql as a plpgsql string literal with a tag it doesn't contain."""
+    tag = "$ddl$"
+    while tag in sql:
+        tag = tag[:-1] + "_$"
+    return f"{tag}{sql}{tag}"
+
+
+def lock_schema(conn: Connection) -> None:
+    """Hold the schema setup lock until the current transaction ends.
+
+    The first replica does the DDL; the others wait here and then find the
+    tables already there. Taken once per transaction; no-op outside Postgres.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    if conn.in_transaction() and conn.info.get("schema_lock") is conn.get_transaction():
+        return
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+    conn.info["schema_lock"] = conn.get_transaction()
+
+
+def missing_tables(conn: Connection) -> List[str]:
+    """Names of model tables that don't exist in the database yet."""
+    names = [table.name for table in Base.metadata.sorted_tables]
+    if conn.dialect.name == "postgresql":
+        return conn.execute(_MISSING_TABLES, {"names": names}).scalars().all()
+    existing = set(inspect(conn).get_table_names())
+    return [name for name in names if name not in existing]
+
+
+def database_is_empty(conn: Connection) -> bool:
+    """True when none of the model tables exist."""
+    return len(missing_tables(conn)) == len(Base.metadata.tables)
+
+
+def create_schema(conn: Connection) -> bool:
+    """Create the tables that don't exist yet.
+
+    On Postgres with a schema.sql present, a fully provisioned database costs
+    one query and an empty one gets the whole script in one round trip. A
+    partially provisioned database, or any other backend, goes through
+    create_all. Must run inside a transaction: the advisory lock taken here
+    is released when it ends.
+
+    Returns True when the database was empty and the full current schema
+    was created, i.e. when it is safe to stamp the Alembic head.
+    """
+    lock_schema(conn)
+    missing = missing_tables(conn)
+    if not missing:
+        return False
+    fresh = len(missing) == len(Base.metadata.tables)
+    if conn.dialect.name == "postgresql":
+        for name in REQUIRED_EXTENSIONS:
+            conn.exec_driver_sql(f"CREATE EXTENSION IF NOT EXISTS {name}")
+    if fresh and conn.dialect.name == "postgresql" and SCHEMA_SQL_PATH.exists():
+        conn.exec_driver_sql(SCHEMA_SQL_PATH.read_text())
+        return True
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+    return fresh
+
+
+def alembic_config(conn: Connection):
+    """Alembic config that runs migrations on conn, in its transaction."""
+    from alembic.config import Config
+
+    config = Config(str(API_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(API_ROOT / "alembic"))
+    config.attributes["connection"] = conn
+    return config
+
+
+def current_revision(conn: Connection) -> Optional[str]:
+    from alembic.runtime.migration import MigrationContext
+
+    return MigrationContext.configure(conn).get_current_revision()
+
+
+def stamp_head(conn: Connection) -> None:
+    """Record the current schema as the Alembic head without running migrations."""
+    from alembic import command
+
+    command.stamp(alembic_config(conn), "head")
+
+
+def adopt_legacy_schema(conn: Connection) -> Optional[str]:
+    """Re-stamp a database provisioned by the pre-Alembic startup.py.
+
+    Such a database is stamped with the initial migration (or not at all,
+    if that stamp failed) while it already has the configs table and app
+    indexes the following migrations would create, so upgrading it would
+    fail. Returns the revision it was stamped with, or None when the
+    database didn't need it.
+    """
+    from alembic import command
+
+    if current_revision(conn) not in (None, INITIAL_REVISION):
+        return None
+    if "configs" in missing_tables(conn):
+        return None
+    command.stamp(alembic_config(conn), LEGACY_CREATE_ALL_REVISION, purge=True)
+    return LEGACY_CREATE_ALL_REVISION
+
+
+if __name__ == "__main__":
+    SCHEMA_SQL_PATH.write_text(generate_schema_sql())
+    print(f"Wrote {SCHEMA_SQL_PATH}")
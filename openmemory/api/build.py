@@ -14,7 +14,11 @@ cd openmemory/api || cd api || {
 echo "📦 Installing Python dependencies..."
 pip install -r requirements.txt
 
+echo "🧾 Generating schema.sql..."
+python -m app.utils.schema
+
 echo "🔧 Setting up database..."
 python startup.py
 
 echo "✅ Build completed successfully!"
+echo "▶️  Run with: uvicorn main:app --loop uvloop --http httptools"
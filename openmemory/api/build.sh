@@ -11,6 +11,9 @@ echo "🚀 Starting OpenMemory build process..."
 echo "📦 Installing Python dependencies..."
 pip install -r requirements.txt
 
+echo "🧾 Generating schema.sql..."
+python -m app.utils.schema
+
 echo "🔧 Setting up database..."
 python startup.py
 
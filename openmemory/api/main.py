@@ -1,21 +1,30 @@
+import asyncio
 import datetime
+import gzip
+import mimetypes
 import os
+import re
+import sys
 import logging
+import zlib
 from pathlib import Path
-from uuid import uuid4
-from contextlib import asynccontextmanager
+from typing import NamedTuple, Optional
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from fastapi_pagination import add_pagination
-from sqlalchemy import text
+from sqlalchemy import literal, select, text, true
+from sqlalchemy.dialects import postgresql, sqlite
 
-from app.database import engine, Base, SessionLocal, get_db
-from app.mcp_server import setup_mcp_server
+from app.database import async_engine, AsyncSessionLocal, start_query_count
 from app.routers import memories_router, apps_router, stats_router, config_router
 from app.models import User, App
+from app.utils.db import ensure_access_log_partitions
+from app.utils.schema import create_schema, stamp_head
 from app.config import USER_ID, DEFAULT_APP_ID
 
 # Configure logging
@@ -32,95 +41,246 @@ VECTOR_STORE_CONFIG = {
     }
 }
 
-def create_database_tables():
+async def create_database_tables():
     """Create database tables with proper error handling"""
     try:
         # Only create tables if environment allows it
         if os.getenv("CREATE_TABLES", "true").lower() == "true":
-            Base.metadata.create_all(bind=engine)
+            async with async_engine.begin() as conn:
+                # An empty database got the full current schema; record it
+                # as the Alembic head so startup.py doesn't replay the
+                # migrations over it
+                if await conn.run_sync(create_schema):
+                    await conn.run_sync(stamp_head)
             logger.info("✅ Database tables created successfully")
         else:
             logger.info("⏭️  Skipping table creation (CREATE_TABLES=false)")
     except Exception as e:
-        logger.error(f"❌ Error creating database tables: {e}")
+        logger.error("❌ Error creating database tables: %s", e)
         # Don't raise here to allow the app to start even if tables exist
 
 
-def create_default_user():
-    """Create default user if it doesn't exist"""
-    db = SessionLocal()
+async def create_default_user_and_app():
+    """Create the default user and their default app if they don't exist"""
+    insert = postgresql.insert if async_engine.dialect.name == "postgresql" else sqlite.insert
     try:
-        # Check if user exists
-        user = db.query(User).filter(User.user_id == USER_ID).first()
-        if not user:
-            # Create default user
-            user = User(
-                id=uuid4(),
-                user_id=USER_ID,
-                name="Default User",
-                email=f"{USER_ID}@openmemory.local",
-                metadata_={
-                    "created_by": "system",
-                    "default_user": True
-                },
-                created_at=datetime.datetime.now(datetime.UTC)
+        # One transaction, no SELECT-then-INSERT: both rows are upserted
+        # with ON CONFLICT DO NOTHING, and the app takes its owner_id from
+        # the users row by user_id. Ids (uuid7) and timestamps come from
+        # the column defaults.
+        async with AsyncSessionLocal.begin() as db:
+            user_result = await db.execute(
+                insert(User.__table__).values(
+                    user_id=USER_ID,
+                    name="Default User",
+                    email=f"{USER_ID}@openmemory.local",
+                    metadata={
+                        "created_by": "system",
+                        "default_user": True
+                    },
+                ).on_conflict_do_nothing(index_elements=["user_id"])
             )
-            db.add(user)
-            db.commit()
-            logger.info(f"✅ Created default user: {USER_ID}")
+            app_result = await db.execute(
+                insert(App.__table__).from_select(
+                    ["name", "description", "owner_id", "metadata", "is_active"],
+                    select(
+                        literal(DEFAULT_APP_ID),
+                        literal("Default OpenMemory MCP app"),
+                        User.id,
+                        literal({"created_by": "system", "default_app": True}, App.metadata_.type),
+                        true(),
+                    ).where(User.user_id == USER_ID)
+                ).on_conflict_do_nothing(index_elements=["owner_id", "name"])
+            )
+
+        if user_result.rowcount:
+            logger.info("✅ Created default user: %s", USER_ID)
         else:
-            logger.info(f"👤 Default user already exists: {USER_ID}")
-            
+            logger.info("👤 Default user already exists: %s", USER_ID)
+        if app_result.rowcount:
+            logger.info("✅ Created default app: %s", DEFAULT_APP_ID)
+        else:
+            logger.info("📱 Default app already exists: %s", DEFAULT_APP_ID)
+
     except Exception as e:
-        logger.error(f"❌ Error creating default user: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        logger.error("❌ Error creating default user and app: %s", e)
 
 
-def create_default_app():
-    """Create default app for the default user"""
-    db = SessionLocal()
+async def init_memory_client():
+    """Build the memory client once at startup (None if it can't be built)"""
     try:
-        # Get the default user
-        user = db.query(User).filter(User.user_id == USER_ID).first()
-        if not user:
-            logger.error(f"❌ Default user {USER_ID} not found, cannot create default app")
-            return
+        from app.utils.memory import get_memory_client_async
+        return await get_memory_client_async()
+    except Exception as e:
+        logger.error("❌ Error initializing memory client: %s", e)
+        return None
 
-        # Check if app already exists
-        existing_app = db.query(App).filter(
-            App.name == DEFAULT_APP_ID,
-            App.owner_id == user.id
-        ).first()
-        
-        if existing_app:
-            logger.info(f"📱 Default app already exists: {DEFAULT_APP_ID}")
-            return
 
-        # Create default app
-        app = App(
-            id=uuid4(),
-            name=DEFAULT_APP_ID,
-            description="Default OpenMemory MCP app",
-            owner_id=user.id,
-            metadata_={
-                "created_by": "system",
-                "default_app": True
-            },
-            is_active=True,
-            created_at=datetime.datetime.now(datetime.UTC),
-            updated_at=datetime.datetime.now(datetime.UTC),
-        )
-        db.add(app)
-        db.commit()
-        logger.info(f"✅ Created default app: {DEFAULT_APP_ID}")
-        
+# Seconds between background health probes; /health serves the latest result
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", 5))
+
+
+# Built once so SQLAlchemy's compiled cache keys on the same object; asyncpg
+# keeps the prepared statement in its per-connection statement cache
+HEALTH_STMT = text("SELECT 1")
+
+
+async def probe_health(app: FastAPI) -> dict:
+    """Check the database and memory client once and return the /health body"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.scalar(HEALTH_STMT)
+    except Exception as e:
+        logger.error("Health check failed: %s", e)
+        return {"status": "unhealthy", "detail": "Database connection failed"}
+
+    try:
+        from app.utils.memory import get_memory_client_async
+        app.state.memory_client = await get_memory_client_async()
+        memory_status = "initialized" if app.state.memory_client else "fallback_mode"
+    except Exception as e:
+        memory_status = f"error: {str(e)}"
+
+    return {
+        "status": "healthy",
+        "database": "postgresql" if "postgresql" in os.getenv("DATABASE_URL", "") else "unknown",
+        "vector_store": "qdrant_cloud",
+        "memory_service": memory_status,
+        "static_files": has_static_files,
+        "timestamp": datetime.datetime.now(datetime.UTC).isoformat()
+    }
+
+
+async def run_health_probes(app: FastAPI):
+    """Refresh app.state.health every HEALTH_PROBE_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(HEALTH_PROBE_INTERVAL)
+        app.state.health = await probe_health(app)
+
+
+async def create_access_log_partitions():
+    """Make sure memory_access_logs has partitions for the coming months"""
+    try:
+        async with async_engine.begin() as conn:
+            created = await conn.run_sync(ensure_access_log_partitions)
+        if created:
+            logger.info("✅ Created access log partitions: %s", ', '.join(created))
     except Exception as e:
-        logger.error(f"❌ Error creating default app: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        logger.error("❌ Error creating access log partitions: %s", e)
+
+
+# UI files up to this size are held in memory and served without touching
+# the filesystem; larger ones go through StaticFiles
+STATIC_CACHE_MAX_BYTES = int(os.getenv("STATIC_CACHE_MAX_BYTES", 1024 * 1024))
+
+
+# Precompressed siblings written by the UI build (app.js -> app.js.br,
+# app.js.gz), in order of preference
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+class CachedFile(NamedTuple):
+    body: bytes
+    br_body: Optional[bytes]
+    gzip_body: Optional[bytes]
+    etag: str
+    media_type: str
+
+
+def _load_cached_file(file: Path) -> CachedFile:
+    body = file.read_bytes()
+    stat = file.stat()
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{zlib.adler32(body):x}"'
+    br_file = file.with_name(file.name + ".br")
+    gzip_file = file.with_name(file.name + ".gz")
+    compressed = gzip_file.read_bytes() if gzip_file.is_file() else gzip.compress(body, 9, mtime=0)
+    return CachedFile(
+        body=body,
+        br_body=br_file.read_bytes() if br_file.is_file() else None,
+        gzip_body=compressed if len(compressed) < len(body) else None,
+        etag=etag,
+        media_type=mimetypes.guess_type(file.name)[0] or "text/plain",
+    )
+
+
+class SPAStaticFiles(StaticFiles):
+    """StaticFiles that falls back to index.html for unknown paths.
+
+    The set of servable files is taken once at startup, so unknown paths go
+    straight to index.html without touching the filesystem. Files up to
+    STATIC_CACHE_MAX_BYTES are also read and gzipped once and answered from
+    memory; larger ones are sent from their precompressed .br/.gz sibling
+    when the build produced one. Set DEV=1 to pick up files added or changed
+    while the server runs.
+    """
+
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        root = Path(directory)
+        self.files = None
+        self.cache = {}
+        if os.getenv("DEV"):
+            return
+        paths = [file for file in root.rglob("*") if file.is_file()]
+        self.files = frozenset(file.relative_to(root).as_posix() for file in paths)
+        for file in paths:
+            if file.suffix in (".br", ".gz"):
+                continue
+            if file.stat().st_size <= STATIC_CACHE_MAX_BYTES:
+                self.cache[file.relative_to(root).as_posix()] = _load_cached_file(file)
+
+    @staticmethod
+    def cached_response(cached: CachedFile, scope) -> Response:
+        request_headers = Headers(scope=scope)
+        headers = {"ETag": cached.etag, "Vary": "Accept-Encoding"}
+        if cached.etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        body = cached.body
+        accept_encoding = request_headers.get("accept-encoding", "")
+        if cached.br_body is not None and "br" in accept_encoding:
+            body = cached.br_body
+            headers["Content-Encoding"] = "br"
+        elif cached.gzip_body is not None and "gzip" in accept_encoding:
+            body = cached.gzip_body
+            headers["Content-Encoding"] = "gzip"
+        return Response(content=body, media_type=cached.media_type, headers=headers)
+
+    async def precompressed_response(self, path: str, scope):
+        """Send path's precompressed sibling if the client accepts it, else None"""
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if encoding in accept_encoding and path + suffix in self.files:
+                # FileResponse takes the media type from the original name
+                # (mimetypes maps app.js.br to text/javascript)
+                response = await super().get_response(path + suffix, scope)
+                response.headers["Vary"] = "Accept-Encoding"
+                if response.status_code == 200:
+                    response.headers["Content-Encoding"] = encoding
+                return response
+        return None
+
+    async def get_response(self, path: str, scope):
+        if self.files is not None:
+            if path == "." or path not in self.files:
+                path = "index.html"
+            cached = self.cache.get(path)
+            if cached is not None and scope["method"] in ("GET", "HEAD"):
+                return self.cached_response(cached, scope)
+            if scope["method"] in ("GET", "HEAD"):
+                response = await self.precompressed_response(path, scope)
+                if response is not None:
+                    return response
+            if path == "index.html":
+                return await super().get_response(path, scope)
+        try:
+            response = await super().get_response(path, scope)
+        except StarletteHTTPException as exc:
+            if exc.status_code != 404:
+                raise
+            return await super().get_response("index.html", scope)
+        if response.status_code == 404:
+            return await super().get_response("index.html", scope)
+        return response
 
 
 def setup_static_files(app: FastAPI):
@@ -135,18 +295,32 @@ def setup_static_files(app: FastAPI):
         return False
 
 
+def origins_to_regex(origins):
+    """Fold a list of origins into one anchored regex; "*" in an origin
+    matches a single host label (e.g. https://*.onrender.com)"""
+    patterns = (re.escape(origin).replace(r"\*", r"[A-Za-z0-9-]+") for origin in origins)
+    return "^(?:" + "|".join(patterns) + ")$"
+
+
 def create_cors_middleware():
     """Create CORS middleware with environment-based configuration"""
-    allowed_origins = os.getenv("CORS_ORIGINS", "*").split(",")
+    allowed_origins = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",")]
     
     # For production, use more restrictive CORS
     if os.getenv("ENV") == "production":
-        allowed_origins = [origin.strip() for origin in allowed_origins if origin.strip() != "*"]
+        allowed_origins = [origin for origin in allowed_origins if origin and origin != "*"]
         if not allowed_origins:
             allowed_origins = ["https://*.onrender.com"]
     
+    if "*" in allowed_origins:
+        origin_kwargs = {"allow_origins": ["*"]}
+    else:
+        # Starlette compiles this once and matches each request's Origin
+        # against it
+        origin_kwargs = {"allow_origin_regex": origins_to_regex(allowed_origins)}
+    
     return CORSMiddleware, {
-        "allow_origins": allowed_origins,
+        **origin_kwargs,
         "allow_credentials": True,
         "allow_methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["*"],
@@ -160,11 +334,20 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting OpenMemory MCP Server...")
     
     # Create database tables
-    create_database_tables()
+    await create_database_tables()
     
     # Create default user and app
-    create_default_user()
-    create_default_app()
+    await create_default_user_and_app()
+
+    await create_access_log_partitions()
+
+    # /health reports on this client rather than building one per probe
+    app.state.memory_client = await init_memory_client()
+
+    # /health returns the latest probe result; probes run on their own
+    # schedule instead of once per request
+    app.state.health = await probe_health(app)
+    health_task = asyncio.create_task(run_health_probes(app))
     
     logger.info("✅ OpenMemory MCP Server startup complete")
     
@@ -172,6 +355,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🔄 Shutting down OpenMemory MCP Server...")
+    health_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await health_task
 
 
 # Create FastAPI app with lifespan management
@@ -186,59 +372,38 @@ app = FastAPI(
 cors_class, cors_kwargs = create_cors_middleware()
 app.add_middleware(cors_class, **cors_kwargs)
 
+# Log requests that issue an unusual number of SQL statements (usually an
+# N+1 loop somewhere in the handler)
+MAX_QUERIES_PER_REQUEST = int(os.getenv("MAX_QUERIES_PER_REQUEST", 50))
+
+
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    counter = start_query_count()
+    response = await call_next(request)
+    if counter[0] > MAX_QUERIES_PER_REQUEST:
+        logger.warning(
+            "%s %s issued %d SQL queries (limit %d)",
+            request.method, request.url.path, counter[0], MAX_QUERIES_PER_REQUEST,
+        )
+    return response
+
 # Setup static file serving
 has_static_files = setup_static_files(app)
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint with database connectivity test"""
-    try:
-        # Test database connection
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
-        
-        # Check memory service status
-        try:
-            from app.memory import get_memory_client
-            memory_client = get_memory_client()
-            memory_status = "initialized" if memory_client else "fallback_mode"
-        except Exception as e:
-            memory_status = f"error: {str(e)}"
-        
-        return {
-            "status": "healthy",
-            "database": "postgresql" if "postgresql" in os.getenv("DATABASE_URL", "") else "unknown",
-            "vector_store": "qdrant_cloud",
-            "memory_service": memory_status,
-            "static_files": has_static_files,
-            "timestamp": datetime.datetime.now(datetime.UTC).isoformat()
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        raise HTTPException(status_code=503, detail="Database connection failed")
+    """Health check endpoint; serves the latest background probe result"""
+    health = app.state.health
+    if health["status"] != "healthy":
+        raise HTTPException(status_code=503, detail=health["detail"])
+    return health
 
 
-# UI routes (only if static files exist)
-if has_static_files:
-    @app.get("/")
-    async def serve_ui():
-        """Serve the main UI"""
-        return FileResponse("static/index.html")
-
-    @app.get("/{path:path}")
-    async def serve_ui_routes(path: str):
-        """Serve UI routes with fallback to index.html for SPA"""
-        file_path = Path(f"static/{path}")
-        
-        # Serve static files directly
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(file_path)
-        
-        # Fallback to index.html for SPA routing
-        return FileResponse("static/index.html")
-else:
+# UI routes (only if static files exist); the UI itself is mounted at the
+# end of this module so API and MCP routes take precedence
+if not has_static_files:
     @app.get("/")
     async def api_info():
         """API information when UI is not available"""
@@ -252,29 +417,42 @@ else:
 
 # Setup MCP server
 try:
+    # Imported here so a broken MCP/Qdrant client install only disables
+    # the MCP endpoints instead of failing the whole import
+    from app.mcp_server import setup_mcp_server
     setup_mcp_server(app)
     logger.info("✅ MCP server setup complete")
 except Exception as e:
-    logger.error(f"❌ Error setting up MCP server: {e}")
+    logger.error("❌ Error setting up MCP server: %s", e)
 
 
 # Include API routers
-app.include_router(memories_router, prefix="/api/v1", tags=["memories"])
-app.include_router(apps_router, prefix="/api/v1", tags=["apps"])
-app.include_router(stats_router, prefix="/api/v1", tags=["stats"])
-app.include_router(config_router, prefix="/api/v1", tags=["config"])
+api_router = APIRouter(prefix="/api/v1")
+for router, tag in (
+    (memories_router, "memories"),
+    (apps_router, "apps"),
+    (stats_router, "stats"),
+    (config_router, "config"),
+):
+    api_router.include_router(router, tags=[tag])
+app.include_router(api_router)
 
 # Add pagination support
 add_pagination(app)
 
+# Serve the UI last: real files (with ETag/Last-Modified and conditional
+# GET support from StaticFiles), index.html for any other path (SPA routing)
+if has_static_files:
+    app.mount("/", SPAStaticFiles(directory="static", html=True), name="ui")
+
 # Log configuration on startup
-logger.info(f"🔧 Configuration:")
-logger.info(f"   Database: {'PostgreSQL' if 'postgresql' in os.getenv('DATABASE_URL', '') else 'Unknown'}")
-logger.info(f"   Vector Store: pgvector")
-logger.info(f"   User ID: {USER_ID}")
-logger.info(f"   Default App: {DEFAULT_APP_ID}")
-logger.info(f"   Environment: {os.getenv('ENV', 'development')}")
-logger.info(f"   Static Files: {'Enabled' if has_static_files else 'Disabled'}")
+logger.info("🔧 Configuration:")
+logger.info("   Database: %s", 'PostgreSQL' if 'postgresql' in os.getenv('DATABASE_URL', '') else 'Unknown')
+logger.info("   Vector Store: pgvector")
+logger.info("   User ID: %s", USER_ID)
+logger.info("   Default App: %s", DEFAULT_APP_ID)
+logger.info("   Environment: %s", os.getenv('ENV', 'development'))
+logger.info("   Static Files: %s", 'Enabled' if has_static_files else 'Disabled')
 
 if __name__ == "__main__":
     import uvicorn
@@ -282,12 +460,20 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     
-    logger.info(f"🌐 Starting server on {host}:{port}")
+    logger.info("🌐 Starting server on %s:%s", host, port)
+    
+    reload = os.getenv("ENV") != "production"
     
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
-        reload=os.getenv("ENV") != "production",
-        log_level="info"
+        reload=reload,
+        # MCP SSE sessions live in process memory, so more than one worker
+        # needs sticky routing in front; opt in with WEB_CONCURRENCY
+        workers=None if reload else int(os.getenv("WEB_CONCURRENCY", 1)),
+        log_level="info",
+        access_log=os.getenv("ACCESS_LOG", "").lower() in ("1", "true", "yes"),
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
     )
@@ -22,80 +22,96 @@ def main():
         logger.error("❌ DATABASE_URL environment variable not found")
         sys.exit(1)
     
-    logger.info(f"🔗 Connecting to database...")
+    logger.info("🔗 Connecting to database...")
     
     try:
-        # Create engine and test connection
         engine = create_engine(database_url)
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        logger.info("✅ Database connection successful")
-        
-        # Setup PostgreSQL extensions if needed
-        if 'postgresql' in database_url:
-            setup_postgres_extensions(engine)
-        
-        # Try to import and create tables
-        logger.info("🔨 Setting up database tables...")
-        import_and_create_tables(engine)
-        
-        # Setup Alembic tracking
-        setup_alembic_tracking(engine)
+        # All setup DDL runs on one connection in one transaction, so the
+        # schema is created atomically. Steps that are allowed to fail run
+        # inside a savepoint.
+        with engine.begin() as conn:
+            logger.info("✅ Database connection successful")
+            
+            # Replicas starting together queue here instead of racing
+            # through the same DDL
+            lock_schema(conn)
+            
+            # Setup PostgreSQL extensions if needed
+            if conn.dialect.name == 'postgresql':
+                setup_postgres_extensions(conn)
+            
+            # Create tables and bring Alembic tracking up to date
+            logger.info("🔨 Setting up database tables...")
+            import_and_create_tables(conn)
         
         logger.info("🎉 Database setup completed successfully!")
         
     except Exception as e:
-        logger.error(f"❌ Database setup failed: {e}")
+        logger.error("❌ Database setup failed: %s", e)
         sys.exit(1)
 
-def setup_postgres_extensions(engine):
+def lock_schema(conn):
+    """Take the app's schema setup lock for the rest of the transaction"""
+    sys.path.insert(0, os.getcwd())
+    try:
+        from app.utils.schema import lock_schema as app_lock_schema
+    except ImportError as e:
+        logger.warning("⚠️ Could not import the schema lock, continuing without it: %s", e)
+        return
+    app_lock_schema(conn)
+
+POSTGRES_EXTENSIONS_SQL = ";\n".join([
+    'CREATE EXTENSION IF NOT EXISTS "uuid-ossp"',
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS btree_gin',
+    'CREATE EXTENSION IF NOT EXISTS vector',
+])
+
+def setup_postgres_extensions(conn):
     """Setup PostgreSQL extensions"""
     try:
-        with engine.connect() as conn:
-            extensions = [
-                'CREATE EXTENSION IF NOT EXISTS "uuid-ossp"',
-                'CREATE EXTENSION IF NOT EXISTS pg_trgm', 
-                'CREATE EXTENSION IF NOT EXISTS btree_gin'
-            ]
-            
-            for ext_sql in extensions:
-                try:
-                    conn.execute(text(ext_sql))
-                except Exception as e:
-                    logger.warning(f"⚠️ Extension note: {e}")
-            
-            conn.commit()
+        # One round trip for the whole script
+        with conn.begin_nested():
+            conn.exec_driver_sql(POSTGRES_EXTENSIONS_SQL)
         logger.info("✅ PostgreSQL extensions setup")
         
     except Exception as e:
-        logger.warning(f"⚠️ Extensions setup warning: {e}")
+        logger.warning("⚠️ Extensions setup warning: %s", e)
 
-def import_and_create_tables(engine):
+def import_and_create_tables(conn):
     """Import models and create tables"""
     try:
         # Add the current directory to Python path
         sys.path.insert(0, os.getcwd())
         
-        # Import database and models
-        from app.database import Base
-        import app.models  # This imports all models and registers them with Base
+        # Import models (registered with Base) and the prebuilt schema loader
+        from app.utils.schema import create_schema, database_is_empty
         
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully")
+        if database_is_empty(conn):
+            # Build the current schema (from schema.sql when it was
+            # generated) and record it as the Alembic head
+            create_schema(conn)
+            logger.info("✅ Database tables created successfully")
+            setup_alembic_tracking(conn, "stamp")
+        else:
+            # Existing database: run the pending migrations first, so
+            # tables they create are not pre-empted by create_all
+            setup_alembic_tracking(conn, "upgrade")
+            create_schema(conn)
+            logger.info("✅ Database tables up to date")
         
     except ImportError as e:
-        logger.error(f"❌ Failed to import models: {e}")
+        logger.error("❌ Failed to import models: %s", e)
         logger.info("🔄 Trying alternative import...")
         
         # Alternative: try direct SQL creation
-        create_tables_with_sql(engine)
+        create_tables_with_sql(conn)
     
     except Exception as e:
-        logger.error(f"❌ Table creation failed: {e}")
+        logger.error("❌ Table creation failed: %s", e)
         raise
 
-def create_tables_with_sql(engine):
+def create_tables_with_sql(conn):
     """Fallback: create tables with direct SQL"""
     logger.info("🔄 Using fallback SQL table creation...")
     
@@ -146,40 +162,39 @@ def create_tables_with_sql(engine):
     ]
     
     try:
-        with engine.connect() as conn:
-            for sql in tables_sql:
-                conn.execute(text(sql))
-            conn.commit()
+        for sql in tables_sql:
+            conn.execute(text(sql))
         logger.info("✅ Basic tables created with SQL")
         
     except Exception as e:
-        logger.error(f"❌ SQL table creation failed: {e}")
+        logger.error("❌ SQL table creation failed: %s", e)
         raise
 
-def setup_alembic_tracking(engine):
-    """Setup Alembic version tracking"""
+def setup_alembic_tracking(conn, action):
+    """Upgrade the database to the Alembic head, or (action="stamp") record a
+    freshly created schema as the head without running migrations"""
     try:
-        with engine.connect() as conn:
-            # Create alembic_version table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS alembic_version (
-                    version_num VARCHAR(32) NOT NULL,
-                    CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num)
-                )
-            """))
-            
-            # Insert current version
-            conn.execute(text("""
-                INSERT INTO alembic_version (version_num) 
-                VALUES ('0b53c747049a') 
-                ON CONFLICT (version_num) DO NOTHING
-            """))
-            
-            conn.commit()
-        logger.info("✅ Alembic tracking setup")
+        # In-process rather than a `python -m alembic` subprocess: the app
+        # and SQLAlchemy are already imported and the engine is reused
+        from alembic import command
+        from app.utils.schema import adopt_legacy_schema, alembic_config, stamp_head
+
+        with conn.begin_nested():
+            if action == "stamp":
+                stamp_head(conn)
+            else:
+                legacy_revision = adopt_legacy_schema(conn)
+                if legacy_revision:
+                    logger.info("🏷️ Stamped tables built by the old setup script as %s", legacy_revision)
+                command.upgrade(alembic_config(conn), "head")
+        logger.info("✅ Alembic %s to head complete", action)
         
     except Exception as e:
-        logger.warning(f"⚠️ Alembic setup warning: {e}")
+        if action != "stamp":
+            # The models expect the migrated schema; don't start without it
+            logger.error("❌ Alembic upgrade failed: %s", e)
+            raise
+        logger.warning("⚠️ Alembic setup warning: %s", e)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+# The app reads its configuration at import time. Always run against a
+# throwaway SQLite file: the fixtures below create and drop every table.
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/openmemory-test.db"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pytest  # noqa: E402
+
+import app.models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.utils.db import invalidate_user_app_cache  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def tables():
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def no_categorization(monkeypatch):
+    """Committed memories would otherwise be sent to the LLM in the background."""
+    monkeypatch.setattr(app.models._categorization_executor, "submit", lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def db():
+    """A session on an empty database; rows are removed after the test."""
+    session = SessionLocal()
+    yield session
+    session.close()
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    invalidate_user_app_cache()
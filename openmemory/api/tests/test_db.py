@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal, _async_database_url
+from app.models import App, User
+from app.utils.db import _user_app_cache, resolve_user_and_app_async
+
+
+async def _resolve(user_id="alice", app_id="cursor"):
+    async with AsyncSessionLocal() as session:
+        return await resolve_user_and_app_async(session, user_id, app_id)
+
+
+@pytest.mark.asyncio
+async def test_resolve_creates_user_and_app(db):
+    user_ref, app_ref = await _resolve()
+
+    user = db.execute(select(User).where(User.user_id == "alice")).scalar_one()
+    app = db.execute(select(App).where(App.owner_id == user.id)).scalar_one()
+    assert user_ref.id == user.id
+    assert (app_ref.id, app_ref.name, app_ref.is_active) == (app.id, "cursor", True)
+
+
+@pytest.mark.asyncio
+async def test_resolve_reuses_existing_rows(db):
+    first = await _resolve()
+    _user_app_cache.clear()
+
+    assert await _resolve() == first
+    assert db.scalar(select(func.count()).select_from(User)) == 1
+    assert db.scalar(select(func.count()).select_from(App)) == 1
+
+
+@pytest.mark.asyncio
+async def test_second_app_shares_the_user(db):
+    user_ref, cursor = await _resolve(app_id="cursor")
+    other_user_ref, claude = await _resolve(app_id="claude")
+
+    assert user_ref == other_user_ref
+    assert cursor.id != claude.id
+
+
+@pytest.mark.asyncio
+async def test_commit_changing_an_app_invalidates_the_cache(db):
+    _, app_ref = await _resolve()
+    db.get(App, app_ref.id).is_active = False
+    db.commit()
+
+    _, app_ref = await _resolve()
+
+    assert app_ref.is_active is False
+
+
+@pytest.mark.asyncio
+async def test_new_user_keeps_the_cache(db):
+    await _resolve()
+    db.add(User(user_id="bob"))
+    db.commit()
+
+    assert ("alice", "cursor") in _user_app_cache
+
+
+@pytest.mark.parametrize(
+    "url, async_url",
+    [
+        ("postgresql://u:p@db/om", "postgresql+asyncpg://u:p@db/om"),
+        ("postgresql+psycopg2://u:p@db/om", "postgresql+asyncpg://u:p@db/om"),
+        ("postgresql+psycopg://u:p@db/om?sslmode=require", "postgresql+asyncpg://u:p@db/om?sslmode=require"),
+        ("sqlite:///./openmemory.db", "sqlite+aiosqlite:///./openmemory.db"),
+    ],
+)
+def test_async_database_url(url, async_url):
+    assert _async_database_url(url).render_as_string(hide_password=False) == async_url
+
+
+def test_async_database_url_rejects_unsupported_backends():
+    with pytest.raises(RuntimeError, match="mysql"):
+        _async_database_url("mysql://u:p@db/om")
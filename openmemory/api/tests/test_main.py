@@ -0,0 +1,103 @@
+import gzip
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+from main import SPAStaticFiles, origins_to_regex
+
+INDEX = b"<!doctype html><div id=root></div>"
+APP_JS = b"console.log('openmemory');\n" * 50
+BIG_JS = b"export const data = 1;\n" * 50
+
+
+@pytest.mark.parametrize(
+    "origin, allowed",
+    [
+        ("https://app.example.com", True),
+        ("https://ui.onrender.com", True),
+        ("https://my-ui-2.onrender.com", True),
+        ("https://a.b.onrender.com", False),
+        ("https://.onrender.com", False),
+        ("https://ui.onrender.com.evil.com", False),
+        ("https://app-example.com", False),
+        ("http://app.example.com", False),
+    ],
+)
+def test_origins_to_regex(origin, allowed):
+    pattern = origins_to_regex(["https://app.example.com", "https://*.onrender.com"])
+
+    assert bool(re.fullmatch(pattern, origin)) is allowed
+
+
+@pytest.fixture
+def ui(tmp_path, monkeypatch):
+    """A UI build with a small cached file and a large precompressed one."""
+    (tmp_path / "index.html").write_bytes(INDEX)
+    (tmp_path / "app.js").write_bytes(APP_JS)
+    (tmp_path / "big.js").write_bytes(BIG_JS)
+    (tmp_path / "big.js.br").write_bytes(b"brotli bytes")
+    (tmp_path / "big.js.gz").write_bytes(gzip.compress(BIG_JS))
+    monkeypatch.delenv("DEV", raising=False)
+    monkeypatch.setattr(main, "STATIC_CACHE_MAX_BYTES", len(APP_JS))
+    app = FastAPI()
+    app.mount("/", SPAStaticFiles(directory=str(tmp_path), html=True), name="ui")
+    return TestClient(app)
+
+
+def test_cached_file_has_etag(ui):
+    response = ui.get("/app.js", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.content == APP_JS
+    assert response.headers["etag"]
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in response.headers
+
+
+def test_matching_etag_is_not_modified(ui):
+    etag = ui.get("/app.js").headers["etag"]
+
+    response = ui.get("/app.js", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_cached_file_is_gzipped_on_request(ui):
+    response = ui.get("/app.js", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == APP_JS
+
+
+def test_large_file_served_from_brotli_sibling(ui):
+    response = ui.get("/big.js", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == b"brotli bytes"
+
+
+def test_large_file_served_from_gzip_sibling(ui):
+    response = ui.get("/big.js", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == BIG_JS
+
+
+def test_large_file_without_accepted_encoding(ui):
+    response = ui.get("/big.js", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == BIG_JS
+
+
+def test_unknown_path_falls_back_to_index(ui):
+    response = ui.get("/memories/123", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.content == INDEX
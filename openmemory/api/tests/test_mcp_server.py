@@ -0,0 +1,201 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import select
+
+import app.models
+from app import mcp_server
+from app.database import AsyncSessionLocal
+from app.mcp_server import _SearchBatcher
+from app.models import Memory, MemoryState, MemoryStatusHistory
+from app.utils.db import resolve_user_and_app_async
+
+
+class FakeQdrant:
+    """Records query_batch_points calls and answers each request with its vector."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    async def query_batch_points(self, collection_name, requests):
+        self.calls.append((collection_name, len(requests)))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return [request.query for request in requests]
+
+
+def _search(batcher, client, i, collection="memories"):
+    return batcher.search(client, collection, [float(i)], None, 10)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_searches_share_one_batch():
+    batcher, client = _SearchBatcher(), FakeQdrant()
+
+    results = await asyncio.gather(*(_search(batcher, client, i) for i in range(3)))
+
+    assert results == [[0.0], [1.0], [2.0]]
+    assert client.calls == [("memories", 3)]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_batch():
+    batcher, client = _SearchBatcher(max_batch=2), FakeQdrant()
+
+    results = await asyncio.gather(*(_search(batcher, client, i) for i in range(5)))
+
+    assert results == [[float(i)] for i in range(5)]
+    assert [size for _, size in client.calls] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_searches_are_grouped_by_collection():
+    batcher, client = _SearchBatcher(), FakeQdrant()
+
+    await asyncio.gather(
+        _search(batcher, client, 0, "a"),
+        _search(batcher, client, 1, "b"),
+        _search(batcher, client, 2, "a"),
+    )
+
+    assert sorted(client.calls) == [("a", 2), ("b", 1)]
+
+
+@pytest.mark.asyncio
+async def test_failure_reaches_every_search_in_the_batch():
+    batcher, client = _SearchBatcher(), FakeQdrant(error=RuntimeError("qdrant down"))
+
+    results = await asyncio.gather(*(_search(batcher, client, i) for i in range(2)), return_exceptions=True)
+
+    assert [str(result) for result in results] == ["qdrant down", "qdrant down"]
+
+
+@pytest.mark.asyncio
+async def test_searches_during_a_batch_go_out_together():
+    batcher, client = _SearchBatcher(window=0.05), FakeQdrant()
+
+    first = asyncio.ensure_future(_search(batcher, client, 0))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    # The first batch is in flight; these two wait for it or the window
+    later = await asyncio.gather(_search(batcher, client, 1), _search(batcher, client, 2))
+
+    assert await first == [0.0]
+    assert later == [[1.0], [2.0]]
+    assert [size for _, size in client.calls] == [1, 2]
+
+
+async def resolve_user_and_app_async_for(user_id, app_id):
+    async with AsyncSessionLocal() as session:
+        return await resolve_user_and_app_async(session, user_id, app_id)
+
+
+class FakeMemoryClient:
+    def __init__(self, results):
+        self.results = results
+
+    def add(self, messages, user_id, metadata):
+        return {"results": self.results}
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Memory ids handed to background categorization."""
+    ids = []
+    monkeypatch.setattr(
+        app.models._categorization_executor, "submit", lambda fn, memory_ids: ids.extend(memory_ids)
+    )
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_add_memories_inserts_new_rows_in_bulk(db, queued, monkeypatch):
+    user_ref, app_ref = await resolve_user_and_app_async_for("alice", "cursor")
+    existing = Memory(user_id=user_ref.id, app_id=app_ref.id, content="old", state=MemoryState.deleted)
+    db.add(existing)
+    db.commit()
+    new_ids = [uuid.uuid4(), uuid.uuid4()]
+    client = FakeMemoryClient([
+        {"id": str(new_ids[0]), "memory": "likes tea", "event": "ADD"},
+        {"id": str(new_ids[1]), "memory": "lives in Oslo", "event": "ADD"},
+        {"id": str(existing.id), "memory": "old, revived", "event": "ADD"},
+    ])
+    monkeypatch.setattr(mcp_server, "get_memory_client_safe", AsyncMock(return_value=client))
+    mcp_server.user_id_var.set("alice")
+    mcp_server.client_name_var.set("cursor")
+
+    reply = json.loads(await mcp_server.add_memories("some text"))
+
+    assert reply["success"] is True
+    db.expire_all()
+    rows = {memory.id: memory for memory in db.execute(select(Memory)).scalars()}
+    assert rows[new_ids[0]].content == "likes tea"
+    assert rows[new_ids[1]].state == MemoryState.active
+    assert rows[existing.id].content == "old, revived"
+    assert set(queued) == {*new_ids, existing.id}
+    history = db.execute(select(MemoryStatusHistory.memory_id, MemoryStatusHistory.old_state)).all()
+    assert sorted(history) == sorted((memory_id, MemoryState.deleted) for memory_id in [*new_ids, existing.id])
+
+
+class FakeEmbedder:
+    def embed(self, query, mode):
+        return [0.0]
+
+
+class FakeVectorSearchClient:
+    """mem0 search fails, so search_memory queries the vector store directly."""
+
+    def __init__(self, points):
+        self.points = points
+        self.queries = []
+        self.embedding_model = FakeEmbedder()
+        self.vector_store = SimpleNamespace(
+            collection_name="memories",
+            client=SimpleNamespace(query_points=self.query_points),
+        )
+
+    def search(self, query, user_id, limit):
+        raise RuntimeError("mem0 search unavailable")
+
+    def query_points(self, collection_name, query, query_filter, limit):
+        self.queries.append((query_filter, limit))
+        excluded = {memory_id for condition in query_filter.must_not or () for memory_id in condition.has_id}
+        return SimpleNamespace(points=[point for point in self.points if point.id not in excluded][:limit])
+
+
+@pytest.mark.asyncio
+async def test_search_drops_exclusions_past_the_filter_cap(db, monkeypatch):
+    user_ref, app_ref = await resolve_user_and_app_async_for("alice", "cursor")
+    memories = [
+        Memory(user_id=user_ref.id, app_id=app_ref.id, content=content, state=state)
+        for content, state in [
+            ("archived", MemoryState.archived),
+            ("deleted", MemoryState.deleted),
+            ("likes tea", MemoryState.active),
+        ]
+    ]
+    db.add_all(memories)
+    db.commit()
+    client = FakeVectorSearchClient([
+        SimpleNamespace(id=str(memory.id), score=1.0, payload={"data": memory.content})
+        for memory in memories
+    ])
+    monkeypatch.setattr(mcp_server, "get_memory_client_safe", AsyncMock(return_value=client))
+    monkeypatch.setattr(mcp_server.memory_utils, "get_async_qdrant_client", lambda: None)
+    monkeypatch.setattr(mcp_server, "_log_access_in_background", lambda rows: None)
+    monkeypatch.setattr(mcp_server, "MAX_EXCLUDED_IDS", 1)
+    mcp_server.user_id_var.set("alice")
+    mcp_server.client_name_var.set("cursor")
+
+    reply = json.loads(await mcp_server.search_memory("tea"))
+
+    assert [hit["memory"] for hit in reply["results"]] == ["likes tea"]
+    query_filter, limit = client.queries[0]
+    assert len(query_filter.must_not[0].has_id) == 1
+    assert limit == mcp_server.SEARCH_LIMIT * mcp_server.SEARCH_OVERFETCH
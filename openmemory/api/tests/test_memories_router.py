@@ -0,0 +1,81 @@
+import uuid
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import app.models
+from app.models import App, Memory, MemoryState
+from app.routers import memories as memories_router
+
+
+class FakeMemoryClient:
+    """Stores nothing; returns one new id per message, as mem0 does with infer=False."""
+
+    def __init__(self):
+        self.calls = []
+
+    def add(self, messages, user_id, metadata, infer=True):
+        self.calls.append({"messages": messages, "user_id": user_id, "infer": infer})
+        return {"results": [
+            {"id": str(uuid.uuid4()), "memory": message["content"], "event": "ADD"}
+            for message in messages
+        ]}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeMemoryClient()
+    monkeypatch.setattr(memories_router, "get_memory_client_async", AsyncMock(return_value=fake))
+    api = FastAPI()
+    api.include_router(memories_router.router)
+    return TestClient(api), fake
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    ids = []
+    monkeypatch.setattr(
+        app.models._categorization_executor, "submit", lambda fn, memory_ids: ids.extend(memory_ids)
+    )
+    return ids
+
+
+def test_import_memories(db, client, queued):
+    http, fake = client
+
+    response = http.post("/api/v1/memories/import", json={
+        "user_id": "alice",
+        "app": "importer",
+        "memories": [
+            {"text": "likes tea", "metadata": {"source": "notes"}},
+            {"text": "lives in Oslo", "created_at": "2024-01-02T03:04:05Z"},
+        ],
+    })
+
+    assert response.status_code == 200
+    ids = [uuid.UUID(memory_id) for memory_id in response.json()["ids"]]
+    assert fake.calls[0]["infer"] is False
+    rows = {memory.id: memory for memory in db.execute(select(Memory)).scalars()}
+    assert [rows[memory_id].content for memory_id in ids] == ["likes tea", "lives in Oslo"]
+    assert rows[ids[0]].metadata_ == {"source": "notes"}
+    assert rows[ids[1]].created_at.year == 2024
+    assert all(memory.state == MemoryState.active for memory in rows.values())
+    # One categorization batch for the whole import
+    assert sorted(queued) == sorted(ids)
+
+
+def test_import_into_paused_app_is_rejected(db, client):
+    http, fake = client
+    http.post("/api/v1/memories/import", json={"user_id": "alice", "app": "importer", "memories": []})
+    db.execute(select(App)).scalar_one().is_active = False
+    db.commit()
+
+    response = http.post("/api/v1/memories/import", json={
+        "user_id": "alice", "app": "importer", "memories": [{"text": "likes tea"}],
+    })
+
+    assert response.status_code == 403
+    assert fake.calls == []
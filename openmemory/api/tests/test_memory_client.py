@@ -0,0 +1,57 @@
+import mem0
+import pytest
+
+from app.utils import memory
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    """Controls the Qdrant probe and records the configs clients are built from."""
+    state = {"up": False, "probes": 0, "configs": []}
+
+    def probe(qdrant_config=None):
+        state["probes"] += 1
+        return state["up"]
+
+    def from_config(config_dict):
+        state["configs"].append(config_dict)
+        return object()
+
+    monkeypatch.setattr(memory, "_test_qdrant_connection", probe)
+    monkeypatch.setattr(memory, "_setup_qdrant_client", lambda qdrant_config=None: None)
+    monkeypatch.setattr(memory, "_ensure_qdrant_indexes", lambda qdrant_config=None: None)
+    monkeypatch.setattr(mem0.Memory, "from_config", from_config)
+    memory.reset_memory_client()
+    yield state
+    memory.reset_memory_client()
+
+
+def test_client_without_qdrant_is_reused_within_the_probe_ttl(db, qdrant):
+    client = memory.get_memory_client()
+
+    assert memory.get_memory_client() is client
+    assert qdrant["probes"] == 1
+    assert "vector_store" not in qdrant["configs"][0]
+
+
+def test_client_without_qdrant_picks_it_up_after_the_probe_ttl(db, qdrant, monkeypatch):
+    basic = memory.get_memory_client()
+    monkeypatch.setattr(memory, "QDRANT_PROBE_TTL", 0)
+    qdrant["up"] = True
+
+    client = memory.get_memory_client()
+
+    assert client is not basic
+    assert "vector_store" in qdrant["configs"][-1]
+    # Built with its vector store, so the fast path applies again
+    assert memory.get_memory_client() is client
+    assert qdrant["probes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_async_fast_path_reprobes_too(db, qdrant, monkeypatch):
+    basic = memory.get_memory_client()
+    monkeypatch.setattr(memory, "QDRANT_PROBE_TTL", 0)
+    qdrant["up"] = True
+
+    assert await memory.get_memory_client_async() is not basic
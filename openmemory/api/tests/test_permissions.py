@@ -0,0 +1,91 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.models import AccessControl, App, Memory, MemoryState, User
+from app.utils.permissions import check_memory_access_permissions, memory_access_clause
+
+
+@pytest.fixture
+def memories(db):
+    """A user with one app and three active memories plus an archived one."""
+    user = User(user_id="alice")
+    db.add(user)
+    db.flush()
+    app = App(owner_id=user.id, name="cursor")
+    db.add(app)
+    db.flush()
+    rows = [
+        Memory(user_id=user.id, app_id=app.id, content=f"memory {i}", state=MemoryState.active)
+        for i in range(3)
+    ]
+    rows.append(Memory(user_id=user.id, app_id=app.id, content="old", state=MemoryState.archived))
+    db.add_all(rows)
+    db.commit()
+    return app, rows
+
+
+def _add_rules(db, app, rows, rules):
+    for effect, index in rules:
+        db.add(AccessControl(
+            subject_type="app",
+            subject_id=app.id,
+            object_type="memory",
+            object_id=None if index is None else rows[index].id,
+            effect=effect,
+        ))
+    db.commit()
+
+
+def _accessible(db, rows, app_id):
+    """Ids allowed by the Python check and by the SQL clause."""
+    by_check = {memory.id for memory in rows if check_memory_access_permissions(db, memory, app_id)}
+    by_clause = set(db.execute(select(Memory.id).where(memory_access_clause(app_id))).scalars())
+    return by_check, by_clause
+
+
+@pytest.mark.parametrize(
+    "rules, expected",
+    [
+        ([], {0, 1, 2}),
+        ([("allow", None)], {0, 1, 2}),
+        ([("deny", None)], set()),
+        ([("allow", 0)], {0}),
+        ([("allow", 0), ("allow", 1), ("deny", 1)], {0}),
+        ([("deny", 1)], set()),
+        ([("allow", 3)], set()),
+    ],
+    ids=["no-rules", "allow-all", "deny-all", "allow-one", "deny-overrides-allow", "deny-only", "allow-archived"],
+)
+def test_clause_matches_check(db, memories, rules, expected):
+    app, rows = memories
+    _add_rules(db, app, rows, rules)
+
+    by_check, by_clause = _accessible(db, rows, app.id)
+
+    assert by_check == by_clause == {rows[i].id for i in expected}
+
+
+def test_inactive_app_sees_nothing(db, memories):
+    app, rows = memories
+    _add_rules(db, app, rows, [("allow", None)])
+    app.is_active = False
+    db.commit()
+
+    assert _accessible(db, rows, app.id) == (set(), set())
+
+
+def test_unknown_app_sees_nothing(db, memories):
+    _, rows = memories
+
+    assert _accessible(db, rows, uuid.uuid4()) == (set(), set())
+
+
+def test_without_app_only_state_counts(db, memories):
+    app, rows = memories
+    _add_rules(db, app, rows, [("deny", None)])
+
+    by_check, by_clause = _accessible(db, rows, None)
+
+    assert by_check == by_clause == {memory.id for memory in rows[:3]}
@@ -0,0 +1,65 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import main
+import startup
+from app.utils.schema import alembic_config, current_revision, missing_tables
+
+BASELINE_SCHEMA = Path(__file__).parent / "data" / "baseline_sqlite_schema.sql"
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "startup.db"
+    engine = create_engine(f"sqlite:///{path}")
+    yield path, engine
+    engine.dispose()
+
+
+def _setup(engine):
+    with engine.begin() as conn:
+        startup.import_and_create_tables(conn)
+    with engine.connect() as conn:
+        head = ScriptDirectory.from_config(alembic_config(conn)).get_current_head()
+        return current_revision(conn), head, missing_tables(conn)
+
+
+def test_fresh_database_is_stamped_head(database):
+    _, engine = database
+
+    revision, head, missing = _setup(engine)
+
+    assert revision == head
+    assert missing == []
+
+
+def test_baseline_database_is_upgraded(database):
+    path, engine = database
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA.read_text())
+
+    revision, head, missing = _setup(engine)
+
+    assert revision == head
+    assert missing == []
+    # A second run finds nothing to do
+    assert _setup(engine) == (head, head, [])
+
+
+@pytest.mark.asyncio
+async def test_schema_built_by_the_app_is_stamped(database, monkeypatch):
+    path, engine = database
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(main, "async_engine", async_engine)
+    await main.create_database_tables()
+    await async_engine.dispose()
+
+    revision, head, missing = _setup(engine)
+
+    assert revision == head
+    assert missing == []